@@ -0,0 +1,38 @@
+import argparse
+import sys
+
+import calculations.Benchmarks as bm
+
+# reproducible timing of numerical hot paths with comparison against a saved baseline
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark numerical hot paths and compare them with a baseline')
+    parser.add_argument('--out', help='JSON file to save results to')
+    parser.add_argument('--baseline', help='JSON file with baseline results to compare with')
+    parser.add_argument('--tolerance', type=float, default=bm.BENCH_TOLERANCE,
+                        help='allowed relative growth of median time over baseline')
+    parser.add_argument('--repeat', type=int, default=5, help='number of timed runs of every case')
+    parser.add_argument('--fs', type=int, nargs='+', default=bm.BENCH_FS, help='sampling rates (Hz)')
+    parser.add_argument('--cycles', type=int, nargs='+', default=bm.BENCH_CYCLE_COUNTS, help='numbers of cycles in sequence')
+    parser.add_argument('--durations', type=float, nargs='+', default=bm.BENCH_DURATIONS,
+                        help='durations of filtered records (s)')
+    parser.add_argument('--hausdorff-cycles', type=int, nargs='+', default=bm.BENCH_HAUSDORFF_COUNTS,
+                        help='numbers of cycles in Hausdorff distance matrix')
+    parser.add_argument('--select', nargs='+', help='run only cases whose names contain any of these substrings')
+    args = parser.parse_args()
+
+    cases = bm.benchmark_cases(args.fs, args.cycles, args.durations, args.hausdorff_cycles)
+    report = bm.run_benchmarks(cases, args.repeat, args.select,
+                               progress=lambda r: print(f"{r['name']:<28} {str(r['params']):<32} "
+                                                        f"median {r['median_ms']:10.3f} ms  min {r['min_ms']:10.3f} ms"))
+    if args.out:
+        bm.save_report(args.out, report)
+
+    if args.baseline:
+        comparison = bm.compare_benchmarks(report, bm.load_report(args.baseline), args.tolerance)
+        print(f'\ncomparison with {args.baseline}:')
+        for result, base, ratio, regression in comparison:
+            print(f"{result['name']:<28} {str(result['params']):<32} {base['median_ms']:10.3f} -> "
+                  f"{result['median_ms']:10.3f} ms  x{ratio:.2f}{'  REGRESSION' if regression else ''}")
+        regressions = sum(regression for *_, regression in comparison)
+        print(f'{regressions} regressions in {len(comparison)} compared cases')
+        sys.exit(1 if regressions else 0)
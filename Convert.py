@@ -0,0 +1,25 @@
+import argparse
+
+import calculations.RecordFiles as rf
+import calculations.CycleSegmentation as seg
+
+# one-time conversion of .txt ECG files into binary memory-mapped records
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Convert .txt ECG file into binary .ecg record')
+    parser.add_argument('txt_path', help='input .txt file')
+    parser.add_argument('path', help='output .ecg file')
+    parser.add_argument('--fs', type=float, default=rf.TXT_FS, help='sampling rate (Hz)')
+    parser.add_argument('--dtype', choices=['float32', 'int16'], default='float32',
+                        help='payload data type (float32 is opened without copying, int16 is half the size but scaled on reading)')
+    parser.add_argument('--boundaries', type=int, nargs='+', help='sample indices where cycles start and end')
+    parser.add_argument('--segment', action='store_true', help='store cycle boundaries found by R peak detection')
+    args = parser.parse_args()
+
+    record = rf.convert_txt(args.txt_path, args.path, args.fs, args.dtype, args.boundaries)
+    if args.segment:
+        # boundaries are written into the header, so the file is converted again once they are known
+        boundaries = seg.cycle_boundaries(seg.detect_r_peaks(record.samples(), record.Fs))
+        del record
+        record = rf.convert_txt(args.txt_path, args.path, args.fs, args.dtype, boundaries)
+        print(f'{max(len(boundaries) - 1, 0)} cycles found')
+    print(f'{len(record)} samples written to {args.path}')
@@ -0,0 +1,42 @@
+import argparse
+import copy
+import json
+import sys
+import time
+
+import calculations.CycleModel as cm
+import calculations.DatasetGenerator as dg
+
+# headless generation of labelled synthetic ECG records over a grid of parameters
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Generate synthetic ECG dataset over a grid of parameters')
+    parser.add_argument('out_dir', help='output directory for shards, index.csv and meta.json')
+    parser.add_argument('--fh', type=int, nargs='+', default=[60], help='heart rates (bpm)')
+    parser.add_argument('--waves', help='JSON file with wave data (a single dict like waves_default or a list of them), '
+                                        'defined at --base-fh heart rate')
+    parser.add_argument('--alt', type=float, nargs='+', default=[0], help='T wave alternation levels (mV)')
+    parser.add_argument('--noise', type=float, nargs='+', default=[0], help='noise levels')
+    parser.add_argument('--filter', nargs='+', default=['none'], help="filter settings: none, exp:<alpha>, sliding:<ms>")
+    parser.add_argument('--duration', type=float, default=30, help='duration of every record (s)')
+    parser.add_argument('--base-fh', type=int, default=60, help='heart rate at which wave data is defined (bpm)')
+    parser.add_argument('--shard-size', type=int, default=256, help='number of records per shard file')
+    parser.add_argument('--workers', type=int, default=None, help='number of worker processes (all cores by default)')
+    parser.add_argument('--seed', type=int, default=0, help='seed of noise')
+    args = parser.parse_args()
+
+    if args.waves is None:
+        waves_list = [copy.deepcopy(cm.waves_default)]
+    else:
+        with open(args.waves) as f:
+            waves_list = json.load(f)
+        if isinstance(waves_list, dict):
+            waves_list = [waves_list]
+    for setting in args.filter:
+        dg.parse_filter(setting)
+
+    grid = dg.parameter_grid(args.fh, waves_list, args.alt, args.noise, args.filter)
+    print(f'generating {len(grid)} records of {args.duration} s into {args.out_dir}')
+    t = time.perf_counter()
+    dg.generate_dataset(args.out_dir, grid, args.duration, args.shard_size, args.workers, args.seed, args.base_fh,
+                        progress=lambda done, total: print(f'\rshards {done}/{total}', end='', file=sys.stderr))
+    print(f'\ndone in {time.perf_counter() - t:.1f} s')
@@ -0,0 +1,63 @@
+import numpy as np
+
+import calculations.HausdorffDistance as hd
+
+# size of grid cells of decimation in normalized phase plane, no point moves farther than a cell diagonal
+APPROX_CELL = 0.01
+# most points kept of a trajectory, cells are doubled until it fits (e.g. a noisy trajectory fills an area)
+APPROX_MAX_POINTS = 256
+# number of cycles on which the approximate medoid is compared with the exact one
+APPROX_CHECK_CYCLES = 10
+# bound of rounding errors of a distance computed in float32 (normalized point sets lie in
+# the unit square, so no distance exceeds sqrt(2) and a few roundings cost a few ulps each)
+FLOAT32_ERROR = 8 * float(np.finfo(np.float32).eps)
+
+# first point of a trajectory in every occupied cell of a square grid, in order along the trajectory
+# (samples of a phase trajectory are dense where it moves slowly, so resampling by arc length would keep
+# too few points around the baseline and too many on noise, grid keeps them where the trajectory is)
+def grid_decimate(points, cell=APPROX_CELL, max_points=APPROX_MAX_POINTS):
+    points = np.asarray(points, dtype=float)
+    while True:
+        keys = np.floor(points / cell).astype(np.int64)
+        keys -= keys.min(axis=0)
+        _, first = np.unique(keys[:, 0] * (keys[:, 1].max() + 1) + keys[:, 1], return_index=True)
+        if first.shape[0] <= max_points:
+            return points[np.sort(first)].astype(np.float32)
+        cell *= 2
+
+# decimated float32 point sets with Hausdorff distance of every one to its original point set
+# by the triangle inequality a distance of two decimated sets differs from the exact one at most by
+# the sum of their errors (plus FLOAT32_ERROR), errors are computed once per set, not per pair
+def decimate_point_sets(point_sets, cell=APPROX_CELL, max_points=APPROX_MAX_POINTS):
+    decimated = [grid_decimate(p, cell, max_points) for p in point_sets]
+    errors = np.array([hd.hausdorff_distance(np.asarray(p, dtype=float), d.astype(float))
+                       for p, d in zip(point_sets, decimated)])
+    return decimated, errors
+
+# approximate M x M matrix of Hausdorff distances between decimated point sets computed in float32,
+# returns it with the matrix of guaranteed bounds of its absolute errors
+def approximate_distance_matrix(point_sets, cell=APPROX_CELL, max_points=APPROX_MAX_POINTS,
+                                max_tile_bytes=hd.MAX_TILE_BYTES):
+    decimated, errors = decimate_point_sets(point_sets, cell, max_points)
+    H = hd.HausdorffEngine(decimated, max_tile_bytes, dtype=np.float32).distance_matrix()
+    bound = errors[:, None] + errors[None, :] + FLOAT32_ERROR
+    np.fill_diagonal(bound, 0)
+    return H, bound
+
+# compare the medoid of approximate matrix H with the exact one on a random sample of cycles
+# (the approximate dominant cycle is always in the sample), only exact distances needed by medoid
+# search are computed; returns approximate and exact medoid of the sample (indices into all point sets),
+# the sample itself and the largest error of H observed on exactly computed pairs
+def check_medoid(point_sets, H, sample_size=APPROX_CHECK_CYCLES, seed=0):
+    M = len(point_sets)
+    medoid = hd.dominant_cycle(H)
+    others = np.random.default_rng(seed).choice(np.delete(np.arange(M), medoid),
+                                                size=min(sample_size, M) - 1, replace=False)
+    sample = np.sort(np.concatenate(([medoid], others))).astype(int)
+    engine = hd.HausdorffEngine([point_sets[m] for m in sample])
+    exact, _ = engine.medoid()
+    H_sample = H[np.ix_(sample, sample)]
+    approx = hd.dominant_cycle(H_sample)
+    computed = ~np.isnan(engine.H)
+    max_error = np.abs(engine.H[computed] - H_sample[computed]).max()
+    return sample[approx], sample[exact], sample, max_error
@@ -0,0 +1,161 @@
+import copy
+import json
+import platform
+import statistics
+import time
+import numpy as np
+import scipy
+
+import calculations.CycleModel as cm
+import calculations.CycleSequence as cs
+import calculations.NoiseModels as nm
+import calculations.FilteringAlgorithms as fa
+import calculations.Differentiation as dif
+import calculations.HausdorffDistance as hd
+import calculations.ApproximateHausdorff as ah
+
+# default sweeps: sampling rates (Hz), numbers of cycles, record durations (s) and numbers of cycles for Hausdorff matrix
+BENCH_FS = (500, 1000, 2048)
+BENCH_CYCLE_COUNTS = (10, 30, 100)
+BENCH_DURATIONS = (10.0, 60.0, 300.0)
+BENCH_HAUSDORFF_COUNTS = (5, 10, 20)
+# every timed run calls the function as many times as needed to last at least this long (s), so short cases are stable
+BENCH_MIN_RUN_TIME = 0.02
+# median time has to grow by more than this fraction over baseline to be reported as regression
+BENCH_TOLERANCE = 0.2
+
+# cycle model class with its own sampling rate (sampling rate is a class attribute of CycleModel)
+def cycle_model_class(Fs):
+    return type(f'CycleModel{Fs}', (cm.CycleModel,), {'Fs': Fs, 'Ts': 1000 / Fs})
+
+# default ECG cycle at 60 bpm sampled with Fs
+def default_cycle(Fs):
+    ecg_cycle = cycle_model_class(Fs)(60, copy.deepcopy(cm.waves_default))
+    ecg_cycle.construct_cycle()
+    return ecg_cycle
+
+# noisy copies of the default cycle, the same for every run
+def noisy_cycles(Fs, count, noise_level=0.01):
+    rng = np.random.default_rng(0)
+    amplitude = default_cycle(Fs).amplitude
+    return [amplitude + noise_level * rng.standard_normal(amplitude.shape[0]) for _ in range(count)]
+
+# normalized phase trajectories of cycles, same as in dominant cycle analysis
+def phase_point_sets(cycles):
+    dz, _ = dif.lagrange_derivative_cycles(cycles)
+    point_sets = []
+    for z_m, dz_m in zip(cycles, dz):
+        z_m = (z_m - z_m.min()) / (z_m.max() - z_m.min())
+        dz_m = (dz_m - dz_m.min()) / (dz_m.max() - dz_m.min())
+        point_sets.append(hd.to_point_set(z_m, dz_m))
+    return point_sets
+
+# benchmark cases as (name, parameters, function to time) built over given sweeps
+# every function prepares its data beforehand, so only the hot path itself is timed
+def benchmark_cases(fs_values=BENCH_FS, cycle_counts=BENCH_CYCLE_COUNTS, durations=BENCH_DURATIONS,
+                    hausdorff_counts=BENCH_HAUSDORFF_COUNTS):
+    cases = []
+    for Fs in fs_values:
+        model = cycle_model_class(Fs)
+        cases.append(('construct_cycle', {'Fs': Fs},
+                      lambda model=model: model(60, copy.deepcopy(cm.waves_default)).construct_cycle()))
+        # incremental update after one wave changed, as when a slider moves
+        ecg_cycle = default_cycle(Fs)
+        def construct_cycle_incremental(ecg_cycle=ecg_cycle):
+            ecg_cycle.waves['T'][0] = 0.3 - ecg_cycle.waves['T'][0]
+            ecg_cycle.construct_cycle()
+        cases.append(('construct_cycle_incremental', {'Fs': Fs}, construct_cycle_incremental))
+        cases.append(('find_ranges', {'Fs': Fs}, default_cycle(Fs).find_ranges))
+
+        for n in cycle_counts:
+            params = {'Fs': Fs, 'n': n}
+            ecg_cycle = default_cycle(Fs)
+            cases.append(('sequence_construction', params,
+                          lambda ecg_cycle=ecg_cycle, n=n: cs.CycleSequence(ecg_cycle, n, noise_seed=0).amp_seq))
+            ecg_sequence = cs.CycleSequence(ecg_cycle, n, noise_seed=0)
+            def alternate_t(ecg_sequence=ecg_sequence):
+                ecg_sequence.alternate_t(0.1)
+                return ecg_sequence.amp_seq
+            cases.append(('alternate_t', params, alternate_t))
+            # cold noise is generated from scratch, warm noise is only rescaled from cached realization
+            def generate_noise_cold(ecg_sequence=ecg_sequence):
+                nm.cached_unit_noise.cache_clear()
+                return ecg_sequence.generate_noise(0.1)
+            cases.append(('generate_noise_cold', params, generate_noise_cold))
+            cases.append(('generate_noise_warm', params, lambda ecg_sequence=ecg_sequence: ecg_sequence.generate_noise(0.1)))
+            cycles = noisy_cycles(Fs, n)
+            cases.append(('compute_derivative', params, lambda cycles=cycles: dif.lagrange_derivative_cycles(cycles)))
+
+        for duration in durations:
+            params = {'Fs': Fs, 'duration': duration}
+            z0 = np.random.default_rng(0).standard_normal(int(duration * Fs))
+            cases.append(('exp_filter', params, lambda z0=z0: fa.exp_filter_array(z0, 0.3)))
+            W0_bin = int(np.ceil(20 * Fs / 1000))
+            cases.append(('sliding_average', params, lambda z0=z0, W0_bin=W0_bin: fa.sliding_average_array(z0, W0_bin)))
+
+        for count in hausdorff_counts:
+            point_sets = phase_point_sets(noisy_cycles(Fs, count))
+            cases.append(('hausdorff_matrix', {'Fs': Fs, 'n': count},
+                          lambda point_sets=point_sets: hd.HausdorffEngine(point_sets).distance_matrix()))
+            # exact medoid search computes only the distances it needs, compare with the whole matrix above
+            cases.append(('hausdorff_medoid', {'Fs': Fs, 'n': count},
+                          lambda point_sets=point_sets: hd.HausdorffEngine(point_sets).medoid()))
+            # approximate matrix includes resampling, error bounds and the check of medoid on a sample
+            def hausdorff_matrix_approx(point_sets=point_sets):
+                H, bound = ah.approximate_distance_matrix(point_sets)
+                return ah.check_medoid(point_sets, H)
+            cases.append(('hausdorff_matrix_approx', {'Fs': Fs, 'n': count}, hausdorff_matrix_approx))
+    return cases
+
+# run function repeat times (warm-up call also sets number of calls per run), times per call are in ms
+def time_function(function, repeat=5, min_run_time=BENCH_MIN_RUN_TIME):
+    t = time.perf_counter()
+    function()
+    number = max(1, int(np.ceil(min_run_time / max(time.perf_counter() - t, 1e-9))))
+    times = []
+    for _ in range(repeat):
+        t = time.perf_counter()
+        for _ in range(number):
+            function()
+        times.append((time.perf_counter() - t) * 1000 / number)
+    return {'min_ms': min(times), 'median_ms': statistics.median(times), 'mean_ms': statistics.mean(times),
+            'repeat': repeat, 'number': number}
+
+# run benchmark cases whose names contain any of the selected substrings (all by default)
+def run_benchmarks(cases, repeat=5, select=None, progress=None):
+    results = []
+    for name, params, function in cases:
+        if select and not any(s in name for s in select):
+            continue
+        result = {'name': name, 'params': params, **time_function(function, repeat)}
+        results.append(result)
+        if progress is not None:
+            progress(result)
+    return {'meta': {'date': time.strftime('%Y-%m-%d %H:%M:%S'), 'python': platform.python_version(),
+                     'numpy': np.__version__, 'scipy': scipy.__version__, 'machine': platform.machine(),
+                     'processor': platform.processor(), 'repeat': repeat},
+            'results': results}
+
+# key of a result for matching it with baseline
+def result_key(result):
+    return result['name'], json.dumps(result['params'], sort_keys=True)
+
+# compare median times of results with baseline, returns list of (result, baseline result, ratio, regression flag)
+def compare_benchmarks(report, baseline, tolerance=BENCH_TOLERANCE):
+    baseline_results = {result_key(result): result for result in baseline['results']}
+    comparison = []
+    for result in report['results']:
+        base = baseline_results.get(result_key(result))
+        if base is None:
+            continue
+        ratio = result['median_ms'] / base['median_ms'] if base['median_ms'] else np.inf
+        comparison.append((result, base, ratio, ratio > 1 + tolerance))
+    return comparison
+
+def save_report(path, report):
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+def load_report(path):
+    with open(path) as f:
+        return json.load(f)
@@ -1,5 +1,28 @@
 import numpy as np
 
+# default ECG cycle wave data at 60 bpm: amplitude, mean, left and right std, start and end bins of both wave halves
+waves_default = {'P': [0.1, 395, 20, 20, 0, 0, 0, 0],
+                'Q': [-0.1, 489, 9, 1, 0, 0, 0, 0],
+                'R': [1, 500, 3, 3, 0, 0, 0, 0],
+                'S': [-0.2, 511, 1, 22, 0, 0, 0, 0],
+                'ST': [0, 583, 1, 1, 0, 0, 0, 0], 
+                'T': [0.2, 660, 25, 25, 0, 0, 0, 0]}
+
+# last value reached when stepping through range(start, stop, step) while ok(value) holds
+# (start itself if it already fails), ok has to hold on a prefix of the range so bisection is enough
+def scan_while(start, stop, step, ok):
+    values = range(start, stop, step)
+    if len(values) == 0 or not ok(values[0]):
+        return int(start)
+    lo, hi = 0, len(values) - 1
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if ok(values[mid]):
+            lo = mid
+        else:
+            hi = mid - 1
+    return values[lo]
+
 # class of an ECG cycle
 class CycleModel:
     # class attributes
@@ -12,17 +35,29 @@ class CycleModel:
         self.t0 = 60 * 1000 / self.Fh # duration of 1 cycle
         self.time = np.arange(0, self.t0 + self.Ts, self.Ts) # time sequence of a single cycle with a step of sampling period over given duration
         self.waves = waves # wave data (mean, std, amplitude)
+        # per-wave cache of the last computed gaussian: wave -> ((a, mu, b1, b2), first bin, amplitude values)
+        self.wave_cache = {}
+
+    # bin number of the time sample closest to x (ms), same as (np.abs(self.time - x)).argmin()
+    def time_to_bin(self, x):
+        return int(np.clip(np.ceil(x / self.Ts - 0.5), 0, self.time.shape[0] - 1))
 
     # create amplitude sequence for cycle
+    # only waves whose parameters changed since the last call are recomputed, and only the
+    # sample spans they covered before and cover now are rewritten in the amplitude array
     def construct_cycle(self):
-        self.amplitude = np.zeros(self.time.shape[0])
+        if not hasattr(self, 'amplitude'):
+            self.amplitude = np.zeros(self.time.shape[0])
+        dirty_spans = []
         for w in self.waves:
             # getting wave data
             params = self.waves[w]
             a, mu, b1, b2 = params[0], params[1], params[2], params[3]
+            if w in self.wave_cache and self.wave_cache[w][0] == (a, mu, b1, b2):
+                continue
             # getting bin number for start and end of wave
-            t1 = (np.abs(self.time - (mu - 3*b1))).argmin()
-            t2 = (np.abs(self.time - (mu + 3*b2))).argmin()
+            t1 = self.time_to_bin(mu - 3*b1)
+            t2 = self.time_to_bin(mu + 3*b2)
             t1_1, t1_2 = t1, np.floor(mu/self.Ts).astype(int)
             t2_1, t2_2 = np.floor(mu/self.Ts).astype(int), t2
             # saving start and end coordinates as wave data
@@ -31,8 +66,23 @@ class CycleModel:
             interval_1 = self.time[t1_1:t1_2+1]
             interval_2 = self.time[t2_1+1:t2_2]
             # calculating amplitude as a gaussian function using given wave data
-            self.amplitude[t1_1:t1_2+1] = a * np.exp(-(np.square(interval_1 - mu) / (2*np.square(b1))))
-            self.amplitude[t2_1+1:t2_2] = a * np.exp(-(np.square(interval_2 - mu) / (2*np.square(b2))))
+            values = np.concatenate((a * np.exp(-(np.square(interval_1 - mu) / (2*np.square(b1)))),
+                                     a * np.exp(-(np.square(interval_2 - mu) / (2*np.square(b2))))))
+            start = min(t1_1, t1_2+1)
+            if w in self.wave_cache:
+                _, old_start, old_values = self.wave_cache[w]
+                dirty_spans.append((old_start, old_start + old_values.shape[0]))
+            dirty_spans.append((start, start + values.shape[0]))
+            self.wave_cache[w] = ((a, mu, b1, b2), start, values)
+        # dirty spans are rebuilt from cached waves in wave order, so overlapping waves
+        # are resolved the same way as when the whole cycle is built from scratch
+        for s1, s2 in dirty_spans:
+            self.amplitude[s1:s2] = 0
+            for w in self.waves:
+                _, start, values = self.wave_cache[w]
+                lo, hi = max(s1, start), min(s2, start + values.shape[0])
+                if lo < hi:
+                    self.amplitude[lo:hi] = values[lo-start:hi-start]
 
     # getting wave start and end coordinates for defining possible mean or std ranges
     def get_t_lims(self, w):
@@ -52,25 +102,10 @@ class CycleModel:
         
         t_prev, t_next = self.get_t_lims(w)
 
-        mu_i_prev = mu
-        for mu_i in range(mu, 0, -1):
-            t1 = (np.abs(self.time - (mu_i - 3*b1))).argmin()
-            if w == 'P' and t1 == t_prev:
-                break
-            if t1 < t_prev:
-                break
-            mu_i_prev = mu_i
-        m_b = mu_i_prev
-
-        mu_i_prev = mu
-        for mu_i in range(mu, int(self.time[-1]), 1):
-            t2 = (np.abs(self.time - (mu_i + 3*b2))).argmin()
-            if w == 'T' and t2 == t_next:
-                break
-            elif t2 > t_next:
-                break
-            mu_i_prev = mu_i
-        m_e = mu_i_prev
+        # wave start has to stay after the end of previous wave (strictly inside the cycle for P)
+        m_b = scan_while(mu, 0, -1, lambda mu_i: self.time_to_bin(mu_i - 3*b1) >= t_prev + (w == 'P'))
+        # wave end has to stay before the start of next wave (strictly inside the cycle for T)
+        m_e = scan_while(mu, int(self.time[-1]), 1, lambda mu_i: self.time_to_bin(mu_i + 3*b2) <= t_next - (w == 'T'))
         
         return m_b, m_e
     
@@ -82,15 +117,7 @@ class CycleModel:
         t_prev, _ = self.get_t_lims(w)
         b1_b = 1
 
-        b1_i_prev = b1
-        for b1_i in range(b1, int(self.time[-1]), 1):
-            t2 = (np.abs(self.time - (mu - 3*b1_i))).argmin()
-            if t2 < t_prev:
-                break
-            if w == 'P' and t2 == t_prev:
-                break
-            b1_i_prev = b1_i
-        b1_e = b1_i_prev
+        b1_e = scan_while(b1, int(self.time[-1]), 1, lambda b1_i: self.time_to_bin(mu - 3*b1_i) >= t_prev + (w == 'P'))
         
         return b1_b, b1_e
         
@@ -103,18 +130,16 @@ class CycleModel:
 
         b2_b = 1
 
-        b2_i_prev = b2
-        for b2_i in range(b2, int(self.time[-1]), 1):
-            t2 = (np.abs(self.time - (mu + 3*b2_i))).argmin()
-            if t2 > t_next:
-                break
-            if w == 'T' and t2 == t_next:
-                break
-            b2_i_prev = b2_i
-        b2_e = b2_i_prev
+        b2_e = scan_while(b2, int(self.time[-1]), 1, lambda b2_i: self.time_to_bin(mu + 3*b2_i) <= t_next - (w == 'T'))
         
         return b2_b, b2_e
 
+    # calculate possible slider ranges of mean and both std sides for every wave at once
+    def find_ranges(self):
+        return {w: {'mu': self.find_range_mu(w),
+                    'b1': self.find_range_b1(w),
+                    'b2': self.find_range_b2(w)} for w in self.waves}
+
     # calculate new wave data after scaling it with new heart rate value
     def fh_normalization(self, Fh_new):
         for w in self.waves:
@@ -0,0 +1,104 @@
+import numpy as np
+
+import calculations.FilteringAlgorithms as fa
+
+# widths of sliding averages forming a band-pass filter (s): the short one removes noise, the long one baseline
+SMOOTH_WINDOW = 0.03
+BASELINE_WINDOW = 0.2
+# width of a light sliding average applied before searching maximum of R wave (s), narrower than R wave
+PEAK_SMOOTH_WINDOW = 0.004
+# half-span of the central difference used as a slope (s)
+SLOPE_SPAN = 0.01
+# width of the window integrating energy of the derivative (s), about the width of a QRS complex
+QRS_WINDOW = 0.15
+# longest part of a region above threshold searched for R peak (s)
+QRS_SEARCH = 0.3
+# shortest allowed interval between two R peaks (s)
+REFRACTORY = 0.25
+# threshold of integrated energy as a fraction of its 99th percentile within a block
+THRESHOLD_FRACTION = 0.3
+# record is processed by blocks of this duration (s), so memory use doesn't grow with record length
+# and the threshold follows slow changes of amplitude
+BLOCK_DURATION = 60
+
+# sliding average of given width (s) centered on every sample
+def smooth(x, width, Fs):
+    return fa.sliding_average_array(x, max(int(width * Fs), 1), mode='same')
+
+# R peaks of one block of samples (indices into the block)
+# signal is band-passed, energy of its slope is integrated over a QRS-wide window, every region above
+# threshold contains one QRS complex and its R peak is the maximum of signal without baseline within the region
+# (band-pass smoothing would flatten the narrow R wave below the T wave, so only a light one is applied there)
+def detect_block(x, Fs):
+    h = max(int(SLOPE_SPAN * Fs), 1)
+    if x.shape[0] < 2*h + 1:
+        return np.zeros(0, dtype=int)
+    x = x - smooth(x, BASELINE_WINDOW, Fs)
+    band = smooth(x, SMOOTH_WINDOW, Fs)
+    peak_signal = smooth(x, PEAK_SMOOTH_WINDOW, Fs)
+    slope = np.zeros(x.shape[0])
+    slope[h:-h] = band[2*h:] - band[:-2*h]
+    energy = np.square(slope)
+    integrated = fa.sliding_average_array(energy, max(int(QRS_WINDOW * Fs), 1), mode='same')
+    threshold = THRESHOLD_FRACTION * np.percentile(integrated, 99)
+    if threshold <= 0:
+        return np.zeros(0, dtype=int)
+    above = np.concatenate(([False], integrated > threshold, [False]))
+    edges = np.flatnonzero(above[1:] != above[:-1])
+    starts, ends = edges[0::2], edges[1::2]
+    if starts.shape[0] == 0:
+        return np.zeros(0, dtype=int)
+    # maxima of all regions at once: regions are laid out as rows of a padded matrix
+    width = min(int((ends - starts).max()), max(int(QRS_SEARCH * Fs), 1))
+    index = starts[:, None] + np.arange(width)
+    inside = index < ends[:, None]
+    values = np.where(inside, peak_signal[np.minimum(index, x.shape[0] - 1)], -np.inf)
+    return starts + np.argmax(values, axis=1)
+
+# drop the smaller of every two R peaks closer than refractory period (in samples) until none are left
+def apply_refractory(x, peaks, refractory):
+    while peaks.shape[0] > 1:
+        close = np.flatnonzero(np.diff(peaks) < refractory)
+        if close.shape[0] == 0:
+            break
+        # from every close pair the smaller peak is dropped (pairs of a chain are resolved in next passes)
+        close = close[np.concatenate(([True], np.diff(close) > 1))]
+        drop = np.where(x[peaks[close]] < x[peaks[close + 1]], close, close + 1)
+        peaks = np.delete(peaks, drop)
+    return peaks
+
+# indices of R peaks in a signal sampled with Fs (Hz), e.g. a whole (memory-mapped) record
+# blocks overlap by the refractory period, peaks found in overlaps are kept only once
+def detect_r_peaks(signal, Fs, block_duration=BLOCK_DURATION):
+    K = signal.shape[0]
+    block = max(int(block_duration * Fs), 1)
+    margin = int(REFRACTORY * Fs)
+    peaks = []
+    for b0 in range(0, K, block):
+        b1 = min(b0 + block, K)
+        lo, hi = max(b0 - margin, 0), min(b1 + margin, K)
+        block_peaks = lo + detect_block(np.asarray(signal[lo:hi], dtype=float), Fs)
+        peaks.append(block_peaks[(block_peaks >= b0) & (block_peaks < b1)])
+    peaks = np.unique(np.concatenate(peaks)) if peaks else np.zeros(0, dtype=int)
+    # slope is not defined at both ends of record, peaks there come only from edge effects
+    h = max(int(SLOPE_SPAN * Fs), 1)
+    peaks = peaks[(peaks >= h) & (peaks < K - h)]
+    return apply_refractory(signal, peaks, margin)
+
+# cycle boundaries (sample indices where cycles start, the last one is where the last cycle ends)
+# every cycle spans from the middle of the previous RR interval to the middle of the next one, so its
+# R peak is in the middle like in a modelled cycle; incomplete beats at both ends of record are left out
+def cycle_boundaries(peaks):
+    peaks = np.asarray(peaks, dtype=int)
+    if peaks.shape[0] < 3:
+        return np.zeros(0, dtype=int)
+    return (peaks[:-1] + peaks[1:]) // 2
+
+# cycles of a signal as views into it between given boundaries (nothing is copied)
+def cycle_views(signal, boundaries):
+    return [signal[b0:b1] for b0, b1 in zip(boundaries[:-1], boundaries[1:])]
+
+# split a signal into cycles, returns views of the cycles and their boundaries
+def segment_cycles(signal, Fs, block_duration=BLOCK_DURATION):
+    boundaries = cycle_boundaries(detect_r_peaks(signal, Fs, block_duration))
+    return cycle_views(signal, boundaries), boundaries
@@ -1,42 +1,160 @@
+import copy
 import numpy as np
 
+import calculations.NoiseModels as nm
+
+# class of an ECG sequence
+# sequence initialized from an ECG cycle is lazy: it keeps one cycle template, per-beat alternation factors
+# and a noise seed, and computes samples only for the requested index range (whole sequence is never stored)
 class CycleSequence:
-    def __init__(self, ecg_cycle=None, n=None, time_seq=None, amp_seq=None):
+    def __init__(self, ecg_cycle=None, n=None, time_seq=None, amp_seq=None, noise_seed=None):
+        # seed of the noise, every block of noise is drawn from its own generator seeded with (noise_seed, block)
+        self.noise_seed = np.random.SeedSequence().entropy if noise_seed is None else noise_seed
+        self.noise_level = 0
+        self.noise_model = 'uniform'
         # this condition is needed when initializing ECG sequence from single ECG cylce
         if time_seq is None:
+            self.lazy = True
             self.ecg_cycle = ecg_cycle
             self.new_t0 = self.ecg_cycle.time[-1]
             self.n = n
-            self.time_seq = np.arange(0, self.new_t0 * self.n + self.ecg_cycle.Ts, self.ecg_cycle.Ts)
-            # np.tile is used here for pasting same cycle n times in 
-            self.amp_seq = np.concatenate((np.tile(self.ecg_cycle.amplitude[:-1], self.n), np.array([0])), axis=0)
+            self.Ts = self.ecg_cycle.Ts
+            # last sample of a cycle is the first sample of the next one, so it is dropped from the template
+            self.template = self.ecg_cycle.amplitude[:-1].copy()
+            self.P = self.template.shape[0] # number of samples per beat
+            self.K = self.n * self.P + 1 # number of samples in sequence (with closing zero sample)
+            self.t_wave = self.t_wave_template()
+            # template without T wave, every beat is base + (its scale factor) * t_wave
+            self.base = self.template - self.t_wave
+            # per-beat scale factors of T wave, repeated cyclically when shorter than the sequence
+            # (an alternation pattern takes only as much memory as the pattern itself)
+            self.lmbd = np.ones(1)
+            # noise is generated beat by beat
+            self.noise_block = self.P
         # this condition is needed when initializing ECG sequence with passing only time and amplitude sequences
         # e.g. composing filtered or noisy ECG from processed raw ECG sequence
         else:
-            self.time_seq = time_seq
-            self.amp_seq = amp_seq
-    
-    # add alternation of T waves to sequence
-    def alternate_t(self, alt):
+            self.lazy = False
+            self.time_values = time_seq
+            self.amp_values = amp_seq
+            self.K = self.amp_values.shape[0]
+            self.Ts = self.time_values[1] - self.time_values[0] if self.K > 1 else 1
+            self.noise_block = 4096
+
+    # full time sequence, computed on access for lazy sequences
+    @property
+    def time_seq(self):
+        return self.get_time()
+
+    # full amplitude sequence, computed on access for lazy sequences
+    @property
+    def amp_seq(self):
+        return self.get_amplitude()
+
+    def __len__(self):
+        return self.K
+
+    # amplitude of a single sample or of a slice of samples
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self.K)
+            if step < 0:
+                return self.get_amplitude(stop + 1, start + 1)[::step]
+            return self.get_amplitude(start, stop)[::step]
+        k = range(self.K)[key]
+        return self.get_amplitude(k, k+1)[0]
+
+    # T wave part of the cycle template, the only part which is changed by alternation
+    def t_wave_template(self):
         params = self.ecg_cycle.waves['T']
         a, mu, b1, b2 = params[0], params[1], params[2], params[3]
-        lmbd_prev = 1
-        for t_i in range(0, self.n):
-            t1_1, t1_2 = params[4] + int(t_i * self.new_t0 / self.ecg_cycle.Ts), params[5] + int(t_i * self.new_t0 / self.ecg_cycle.Ts)
-            t2_1, t2_2 = params[6] + int(t_i * self.new_t0 / self.ecg_cycle.Ts), params[7] + int(t_i * self.new_t0 / self.ecg_cycle.Ts)
-            if lmbd_prev == 1:
-                lmbd = 1 + alt / a
-            elif lmbd_prev == (1 + alt / a):
-                lmbd = 1
-            interval_1 = self.time_seq[t1_1:t1_2+1]
-            interval_2 = self.time_seq[t2_1+1:t2_2]
-            self.amp_seq[t1_1:t1_2+1] = (a * lmbd) * np.exp(-(np.square(interval_1 - (mu + t_i * self.new_t0)) / (2*np.square(b1))))
-            self.amp_seq[t2_1+1:t2_2] = (a * lmbd) * np.exp(-(np.square(interval_2 - (mu + t_i * self.new_t0)) / (2*np.square(b2))))
-            lmbd_prev = lmbd
+        t1_1, t1_2, t2_1, t2_2 = int(params[4]), int(params[5]), int(params[6]), int(params[7])
+        time = self.ecg_cycle.time[:self.P]
+        t_wave = np.zeros(self.P)
+        t_wave[t1_1:t1_2+1] = a * np.exp(-(np.square(time[t1_1:t1_2+1] - mu) / (2*np.square(b1))))
+        t_wave[t2_1+1:t2_2] = a * np.exp(-(np.square(time[t2_1+1:t2_2] - mu) / (2*np.square(b2))))
+        return t_wave
+
+    # time values (ms) of samples start..stop-1
+    def get_time(self, start=0, stop=None):
+        start, stop, _ = slice(start, stop).indices(self.K)
+        if not self.lazy:
+            return self.time_values[start:stop]
+        return np.arange(start, max(start, stop)) * self.Ts
+
+    # amplitude values of samples start..stop-1 with alternation and noise applied
+    def get_amplitude(self, start=0, stop=None):
+        start, stop, _ = slice(start, stop).indices(self.K)
+        stop = max(start, stop)
+        if not self.lazy:
+            amp = self.amp_values[start:stop]
+        else:
+            amp = np.zeros(stop - start)
+            # only beats overlapping requested range are built, closing sample of sequence stays zero
+            b0, b1 = start // self.P, min(-(-stop // self.P), self.n)
+            if b0 < b1:
+                beats = self.get_beats(b0, b1)
+                lo, hi = max(start, b0 * self.P), min(stop, b1 * self.P)
+                amp[lo-start:hi-start] = beats.ravel()[lo - b0*self.P:hi - b0*self.P]
+        if self.noise_level:
+            amp = amp + self.noise_level * self.peak() * self.get_unit_noise(start, stop)
+        return amp
+
+    # beats b0..b1-1 as (beats x samples per beat) array, its ravel() is the sequence itself without copying
+    # T wave template is computed once, alternation is a single broadcast multiply by per-beat factors
+    def get_beats(self, b0=0, b1=None):
+        b0, b1, _ = slice(b0, b1).indices(self.n)
+        return self.base + self.beat_factors(b0, b1)[:, None] * self.t_wave
+
+    # T wave scale factors of beats b0..b1-1
+    def beat_factors(self, b0, b1):
+        return self.lmbd[np.arange(b0, b1) % self.lmbd.shape[0]]
+
+    # iterate over sequence in chunks of (time, amplitude) arrays
+    def chunks(self, chunk_size, start=0, stop=None):
+        start, stop, _ = slice(start, stop).indices(self.K)
+        for k in range(start, stop, chunk_size):
+            yield self.get_time(k, min(k + chunk_size, stop)), self.get_amplitude(k, min(k + chunk_size, stop))
+
+    # maximal amplitude of sequence without noise
+    def peak(self):
+        if not self.lazy:
+            return np.max(self.amp_values)
+        # amplitude is linear in the T wave scale factor, so the maximum is reached for extreme factors
+        lmbd = self.lmbd[:self.n]
+        lmbd = np.array([lmbd.min(), lmbd.max()]).reshape(-1, 1)
+        return max(0, np.max(self.base + lmbd * self.t_wave))
+
+    # unit noise of the sequence noise model for samples start..stop-1, same samples always get the same noise
+    # realization of the whole sequence is cached, so changing only noise level costs a single multiply
+    def get_unit_noise(self, start, stop):
+        return nm.get_unit_noise(self.noise_model, self.noise_seed, start, stop, self.K, self.Ts, self.noise_block)
+
+    # add alternation of T waves to sequence
+    # alt is either a single alternation level (mV) added to T wave amplitude of beats marked 'A' in
+    # a pattern repeated over the sequence ('AB' - every other beat starting from the first, 'ABBA', ...)
+    # or a series of levels with one value per beat (e.g. random amplitude series)
+    def alternate_t(self, alt, pattern='AB'):
+        a = self.ecg_cycle.waves['T'][0]
+        if np.ndim(alt) == 0:
+            alt = alt * np.array([beat == 'A' for beat in pattern.upper()])
+        else:
+            alt = np.asarray(alt, dtype=float)
+            if alt.shape != (self.n,):
+                raise ValueError(f'expected {self.n} alternation levels (one per beat), got {alt.shape[0]}')
+        # T wave of zero amplitude cannot be scaled
+        self.lmbd = 1 + alt / a if a != 0 else np.ones(1)
 
     # add noise to sequence
     def generate_noise(self, noise_level):
-        h0 = np.max(self.amp_seq)
-        amp_size = self.amp_seq.shape
-        noise = noise_level * np.random.uniform(low=-h0, high=h0, size=amp_size)
+        h0 = self.peak()
+        noise = noise_level * h0 * self.get_unit_noise(0, self.K)
         return noise
+
+    # copy of sequence with noise of given level (and model, if passed), template and alternation data are shared
+    def with_noise(self, noise_level, noise_model=None):
+        noisy_sequence = copy.copy(self)
+        noisy_sequence.noise_level = noise_level
+        if noise_model is not None:
+            noisy_sequence.noise_model = noise_model
+        return noisy_sequence
@@ -0,0 +1,104 @@
+import copy
+import csv
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+
+import calculations.CycleModel as cm
+import calculations.CycleSequence as cs
+import calculations.FilteringAlgorithms as fa
+
+# parse filter setting: 'none', 'exp:<alpha>' or 'sliding:<window width in ms>'
+def parse_filter(setting):
+    name, _, value = setting.partition(':')
+    if name == 'none':
+        return name, None
+    if name == 'exp':
+        return name, float(value)
+    if name == 'sliding':
+        return name, float(value)
+    raise ValueError(f"unknown filter setting '{setting}', expected 'none', 'exp:<alpha>' or 'sliding:<ms>'")
+
+# all combinations of grid parameters, one dictionary per record
+def parameter_grid(heart_rates, waves_list, alt_levels, noise_levels, filters):
+    return [{'fh': fh, 'waves': waves, 'alt': alt, 'noise_level': noise_level, 'filter': setting}
+            for fh, waves, alt, noise_level, setting
+            in itertools.product(heart_rates, waves_list, alt_levels, noise_levels, filters)]
+
+# ECG cycle with heart rate fh built from wave data defined at heart rate base_fh
+def build_cycle(waves, fh, base_fh=60):
+    ecg_cycle = cm.CycleModel(base_fh, copy.deepcopy(waves))
+    ecg_cycle.construct_cycle()
+    if fh != base_fh:
+        ecg_cycle.fh_normalization(fh)
+        ecg_cycle = cm.CycleModel(fh, ecg_cycle.waves)
+        ecg_cycle.construct_cycle()
+    return ecg_cycle
+
+# amplitude of one record with n_samples samples
+def generate_record(params, n_samples, noise_seed, base_fh=60):
+    ecg_cycle = build_cycle(params['waves'], params['fh'], base_fh)
+    samples_per_beat = ecg_cycle.time.shape[0] - 1
+    n = max(1, int(np.ceil((n_samples - 1) / samples_per_beat)))
+    ecg_sequence = cs.CycleSequence(ecg_cycle, n, noise_seed=noise_seed)
+    ecg_sequence.alternate_t(params['alt'])
+    ecg_sequence = ecg_sequence.with_noise(params['noise_level'])
+    amp_seq = ecg_sequence.get_amplitude(0, n_samples)
+    name, value = parse_filter(params['filter'])
+    if name == 'exp':
+        amp_seq = fa.exp_filter_array(amp_seq, value)
+    elif name == 'sliding':
+        amp_seq = fa.sliding_average_array(amp_seq, np.ceil(value / ecg_cycle.Ts).astype(int))
+    return amp_seq
+
+# noise seed of a record, derived from dataset seed so every record is reproducible on its own
+def record_seed(seed, record):
+    return int(np.random.SeedSequence([seed, record]).generate_state(1)[0])
+
+# generate records of one shard and write them straight into a memory-mapped .npy file
+def generate_shard(path, records, n_samples, seed, base_fh=60):
+    data = np.lib.format.open_memmap(path, mode='w+', dtype=np.float32, shape=(len(records), n_samples))
+    for row, (record, params) in enumerate(records):
+        data[row] = generate_record(params, n_samples, record_seed(seed, record), base_fh)
+    data.flush()
+    del data
+    return path
+
+# generate every record of the grid with a pool of processes
+# records are written as (records x samples) float32 shards together with index.csv which maps
+# every record to its shard, row and parameters, and meta.json with sampling data
+def generate_dataset(out_dir, grid, duration, shard_size=256, workers=None, seed=0, base_fh=60, progress=None):
+    os.makedirs(out_dir, exist_ok=True)
+    n_samples = int(round(duration * cm.CycleModel.Fs)) + 1
+    records = list(enumerate(grid))
+    shards = [records[r:r+shard_size] for r in range(0, len(records), shard_size)]
+    paths = [os.path.join(out_dir, f'shard_{shard:05d}.npy') for shard in range(len(shards))]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(generate_shard, path, shard_records, n_samples, seed, base_fh)
+                   for path, shard_records in zip(paths, shards)]
+        for done, future in enumerate(as_completed(futures), start=1):
+            future.result()
+            if progress is not None:
+                progress(done, len(futures))
+
+    with open(os.path.join(out_dir, 'index.csv'), 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['record', 'shard', 'row', 'fh', 'alt', 'noise_level', 'filter', 'noise_seed', 'waves'])
+        for shard, shard_records in enumerate(shards):
+            for row, (record, params) in enumerate(shard_records):
+                writer.writerow([record, os.path.basename(paths[shard]), row, params['fh'], params['alt'],
+                                 params['noise_level'], params['filter'], record_seed(seed, record),
+                                 json.dumps(params['waves'])])
+    with open(os.path.join(out_dir, 'meta.json'), 'w') as f:
+        json.dump({'Fs': cm.CycleModel.Fs, 'duration': duration, 'samples': n_samples, 'records': len(records),
+                   'shards': len(shards), 'seed': seed, 'base_fh': base_fh, 'dtype': 'float32'}, f, indent=4)
+    return paths
+
+# open generated dataset: parameter index rows and memory-mapped shards
+def open_dataset(out_dir):
+    with open(os.path.join(out_dir, 'index.csv'), newline='') as f:
+        index = list(csv.DictReader(f))
+    shards = {name: np.load(os.path.join(out_dir, name), mmap_mode='r') for name in sorted({r['shard'] for r in index})}
+    return index, shards
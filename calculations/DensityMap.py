@@ -0,0 +1,91 @@
+from collections import OrderedDict
+import numpy as np
+
+import calculations.GrowableArray as ga
+
+# number of bins along each axis of a density map, cost of drawing depends only on it
+DENSITY_BINS = 256
+# range of every axis is widened by this fraction of its span, so a few added cycles usually still fit
+RANGE_MARGIN = 0.05
+# number of histograms of different lags kept, so moving a slider back and forth doesn't rebin samples
+HISTOGRAM_CACHE = 8
+
+# range of values widened by a margin on both sides (never empty)
+def padded_range(values):
+    lo, hi = float(np.min(values)), float(np.max(values))
+    margin = (hi - lo) * RANGE_MARGIN or 1.0
+    return lo - margin, hi + margin
+
+# indices of bins of values in range lo..hi split into given number of bins
+def bin_index(values, lo, hi, bins):
+    index = ((np.asarray(values, dtype=float) - lo) * (bins / (hi - lo))).astype(np.int32)
+    return np.clip(index, 0, bins - 1)
+
+# whether all values are inside range lo..hi
+def in_range(values, lo, hi):
+    return values.shape[0] == 0 or (np.min(values) >= lo and np.max(values) <= hi)
+
+# 2D histogram of pairs of bin indices, counts[ix, iy]
+def histogram(ix, iy, bins):
+    return np.bincount(ix.astype(np.int64) * bins + iy, minlength=bins * bins).reshape(bins, bins)
+
+# density of a trajectory (x[i], y[i + lag]) binned into a bins x bins image
+# x and y are the same signal for a pseudophase trajectory (y=None), lag is 0 for a phase trajectory;
+# samples are binned once, so changing lag only counts pairs of bin indices, and samples appended
+# to the end of signal are binned and counted alone as long as they fit the current range
+class DensityMap:
+    def __init__(self, bins=DENSITY_BINS, cache_size=HISTOGRAM_CACHE):
+        self.bins = bins
+        self.cache_size = cache_size
+        self.n = 0
+
+    # bin whole signals (x and y of the same length, or only x for a pseudophase trajectory)
+    def set_data(self, x, y=None):
+        self.x_range = padded_range(x)
+        self.ix = ga.GrowableArray(bin_index(x, *self.x_range, self.bins))
+        if y is None:
+            self.y_range, self.iy = self.x_range, self.ix
+        else:
+            self.y_range = padded_range(y)
+            self.iy = ga.GrowableArray(bin_index(y, *self.y_range, self.bins))
+        self.n = len(self.ix)
+        self.histograms = OrderedDict()
+
+    # follow signals which grew at their end since the last call, earlier samples must be unchanged
+    # only the new samples are binned unless some of them are out of range, then everything is rebinned
+    def update(self, x, y=None):
+        x_new = x[self.n:]
+        y_new = x_new if y is None else y[self.n:]
+        if self.n == 0 or x.shape[0] < self.n or not (in_range(x_new, *self.x_range) and in_range(y_new, *self.y_range)):
+            self.set_data(x, y)
+            return
+        n_old = self.n
+        self.ix.extend(bin_index(x_new, *self.x_range, self.bins))
+        if y is not None:
+            self.iy.extend(bin_index(y_new, *self.y_range, self.bins))
+        self.n = len(self.ix)
+        # cached histograms get only the pairs ending in new samples
+        for lag, counts in self.histograms.items():
+            i0 = max(n_old - lag, 0)
+            i1 = max(self.n - lag, i0)
+            counts += histogram(self.ix.data[i0:i1], self.iy.data[i0+lag:i1+lag], self.bins)
+
+    # histogram of pairs (x[i], y[i + lag]), counts[ix, iy]
+    def counts(self, lag=0):
+        if lag in self.histograms:
+            self.histograms.move_to_end(lag)
+            return self.histograms[lag]
+        counts = histogram(self.ix.data[:max(self.n-lag, 0)], self.iy.data[lag:self.n], self.bins)
+        self.histograms[lag] = counts
+        if len(self.histograms) > self.cache_size:
+            self.histograms.popitem(last=False)
+        return counts
+
+    # log-scaled image of histogram (dense regions don't hide rarely visited parts of trajectory)
+    def image(self, lag=0):
+        return np.log1p(self.counts(lag))
+
+    # rectangle (x, y, width, height) covered by the image in coordinates of signals
+    def rect(self):
+        (x0, x1), (y0, y1) = self.x_range, self.y_range
+        return x0, y0, x1 - x0, y1 - y0
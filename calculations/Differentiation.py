@@ -0,0 +1,26 @@
+import numpy as np
+from scipy.ndimage import correlate1d
+
+# coefficients of 6th-order central difference (1st-order Lagrange derivative over 7 points)
+LAGRANGE_WEIGHTS = np.array([-1, 9, -45, 0, 45, -9, 1]) / 60
+# number of zero samples the stencil reaches beyond each end of a cycle
+SAFE_BORDER = 3
+
+# derivative of a single cycle or of every row of a 2D batch of equal-length cycles
+# samples outside of a cycle are treated as zeros
+def lagrange_derivative(z):
+    return correlate1d(np.asarray(z, dtype=float), LAGRANGE_WEIGHTS, axis=-1, mode='constant', cval=0)
+
+# derivative of a ragged list of cycles in one vectorized call
+# returns list of per-cycle derivatives and their concatenation, list items are views of the latter
+def lagrange_derivative_cycles(z):
+    if len(z) == 0:
+        return [], np.zeros(0)
+    lengths = np.array([len(cycle) for cycle in z])
+    # cycles are laid out one after another with zero borders in between so they don't affect each other
+    idx = np.arange(lengths.sum()) + np.repeat(np.arange(len(z)) * SAFE_BORDER, lengths)
+    buffer = np.zeros(idx[-1] + 1 if idx.shape[0] else 0)
+    buffer[idx] = np.concatenate(z)
+    dz_flattened = lagrange_derivative(buffer)[idx]
+    dz = np.split(dz_flattened, np.cumsum(lengths)[:-1])
+    return dz, dz_flattened
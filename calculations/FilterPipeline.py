@@ -0,0 +1,157 @@
+import collections
+import itertools
+import numpy as np
+
+import calculations.FilteringAlgorithms as fa
+
+# memory budget of cached stage outputs of a pipeline (bytes)
+PIPELINE_MEMORY_BUDGET = 256 * 1024**2
+
+# exponential filtering stage
+def exp_filter_stage(z0, alpha):
+    return fa.exp_filter_array(z0, alpha)
+
+# sliding average filtering stage, window width is given in ms and converted to bins with sampling period Ts (ms)
+def sliding_average_stage(z0, winwidth, Ts, mode='causal'):
+    return fa.sliding_average_array(z0, int(np.ceil(winwidth / Ts)), mode)
+
+# exponential filtering stage for many alpha values at once
+def exp_filter_stage_batch(z0, alphas):
+    return list(fa.exp_filter_batch(z0, alphas))
+
+# sliding average filtering stage for many window widths (ms) at once
+def sliding_average_stage_batch(z0, winwidths, Ts, mode='causal'):
+    W0_bins = np.ceil(np.asarray(winwidths) / Ts).astype(int)
+    rows = fa.sliding_average_batch(z0, W0_bins, mode)
+    # rows of 'valid' mode are padded with nan in batch, but are shorter when filtered one by one
+    if mode == 'valid':
+        return [row[:z0.shape[0] - W0_bin + 1] for row, W0_bin in zip(rows, W0_bins)]
+    return list(rows)
+
+# stages which can be chained in a pipeline: name -> stage function of input array and parameters
+FILTER_STAGES = {'exp_filter': exp_filter_stage,
+                 'sliding_average': sliding_average_stage}
+# batch versions of stages: (name, swept parameter) -> function of input array, parameter values and other parameters
+FILTER_STAGES_BATCH = {('exp_filter', 'alpha'): exp_filter_stage_batch,
+                       ('sliding_average', 'winwidth'): sliding_average_stage_batch}
+
+# ordered chain of filtering stages applied to an input signal
+# output of every stage is cached with a key made of input identity and parameters of all stages up to it,
+# so changing parameters of a later stage reuses outputs of earlier ones; least recently used outputs
+# are evicted when cache exceeds memory budget
+class FilterPipeline:
+    def __init__(self, stages=None, memory_budget=PIPELINE_MEMORY_BUDGET):
+        self.stages = []
+        for name, params in stages or []:
+            self.add_stage(name, **params)
+        self.memory_budget = memory_budget
+        self.cache = collections.OrderedDict()
+        self.nbytes = 0
+        self.input = None
+        self.input_key = None
+        self.input_keys = itertools.count()
+        # statistics of cache usage
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.stages)
+
+    # set input signal, a new array gets a new identity so outputs of the previous one are never reused
+    def set_input(self, z0):
+        if z0 is not self.input:
+            self.input = z0
+            self.input_key = next(self.input_keys)
+
+    # append stage to the end of chain, returns its index
+    def add_stage(self, name, **params):
+        if name not in FILTER_STAGES:
+            raise ValueError(f'unknown filter stage {name}, expected one of {", ".join(FILTER_STAGES)}')
+        self.stages.append((name, params))
+        return len(self.stages) - 1
+
+    # change parameters of stage i
+    def set_params(self, i, **params):
+        name, old_params = self.stages[i]
+        self.stages[i] = (name, {**old_params, **params})
+
+    # remove stage i from chain
+    def remove_stage(self, i):
+        del self.stages[i]
+
+    # replace the whole chain of stages with list of (name, params) pairs
+    def set_stages(self, stages):
+        self.stages = []
+        for name, params in stages:
+            self.add_stage(name, **params)
+
+    # cache key of output of stage i with given parameters of all stages up to it
+    def stage_key(self, i, stages=None):
+        stages = self.stages if stages is None else stages
+        return (self.input_key,) + tuple((name, tuple(sorted(params.items()))) for name, params in stages[:i+1])
+
+    # put output into cache (read-only, it is shared with every caller) and evict old outputs over budget
+    def store(self, key, output):
+        output = np.asarray(output)
+        output.flags.writeable = False
+        if output.nbytes <= self.memory_budget:
+            self.cache[key] = output
+            self.nbytes += output.nbytes
+            while self.nbytes > self.memory_budget:
+                _, evicted = self.cache.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+        return output
+
+    # cached output with given key (marked as recently used) or None
+    def lookup(self, key):
+        output = self.cache.get(key)
+        if output is not None:
+            self.cache.move_to_end(key)
+            self.hits += 1
+        return output
+
+    # output of stage i (of the last stage by default), only stages after the last cached output are computed
+    def run(self, i=None):
+        if self.input is None:
+            raise ValueError('pipeline has no input')
+        i = len(self.stages) - 1 if i is None else i
+        # find the latest stage with cached output
+        output, start = self.input, 0
+        for j in range(i, -1, -1):
+            cached = self.lookup(self.stage_key(j))
+            if cached is not None:
+                output, start = cached, j + 1
+                break
+        for j in range(start, i + 1):
+            name, params = self.stages[j]
+            self.misses += 1
+            output = self.store(self.stage_key(j), FILTER_STAGES[name](output, **params))
+        return output
+
+    # compute outputs of stage i for many values of one of its parameters at once (with batch version of stage)
+    # and cache them, so switching between these values later is only a lookup
+    # nothing is done while output for the current value of parameter is cached, and outputs of all values
+    # are computed only if they fit into memory budget together (otherwise run computes them one by one on demand)
+    def sweep(self, i, param, values):
+        name, params = self.stages[i]
+        if self.stage_key(i) in self.cache:
+            return
+        z0 = self.run(i - 1) if i > 0 else self.input
+        if len(values) * np.asarray(z0).nbytes > self.memory_budget:
+            return
+        keys = {value: self.stage_key(i, self.stages[:i] + [(name, {**params, param: value})]) for value in values}
+        missing = [value for value, key in keys.items() if key not in self.cache]
+        other_params = {k: v for k, v in params.items() if k != param}
+        batch = FILTER_STAGES_BATCH.get((name, param))
+        if batch is None:
+            outputs = [FILTER_STAGES[name](z0, **other_params, **{param: value}) for value in missing]
+        else:
+            outputs = batch(z0, missing, **other_params)
+        for value, output in zip(missing, outputs):
+            self.misses += 1
+            self.store(keys[value], output)
+
+    # drop all cached outputs
+    def clear(self):
+        self.cache.clear()
+        self.nbytes = 0
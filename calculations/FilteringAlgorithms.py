@@ -1,26 +1,76 @@
 import numpy as np
+from scipy.signal import lfilter
 import calculations.CycleModel as cm
 
 # define exponential filtering algorithm
 def exp_filter(ecg_sequence, alpha):
-    z0 = ecg_sequence.amp_seq
-    K = z0.shape[0]
-    z0_tilda = np.zeros(K)
-    z0_tilda[0] = z0[0]
-    for k in range(1, K):
-        z0_tilda[k] = z0_tilda[k-1] + alpha * (z0[k] - z0_tilda[k-1])
+    return exp_filter_array(ecg_sequence.amp_seq, alpha)
+
+# exponential filtering of a raw amplitude array (or of every row of a 2D array of signals)
+# recurrence z0_tilda[k] = z0_tilda[k-1] + alpha * (z0[k] - z0_tilda[k-1]) with z0_tilda[0] = z0[0]
+# is a first-order IIR filter, so it is evaluated by compiled lfilter instead of a python loop
+def exp_filter_array(z0, alpha):
+    z0 = np.asarray(z0, dtype=float)
+    # initial filter state which makes the first output sample equal to the first input sample
+    zi = (1 - alpha) * z0[..., :1]
+    z0_tilda, _ = lfilter([alpha], [1, alpha - 1], z0, axis=-1, zi=zi)
     return z0_tilda
 
+# exponential filtering of one signal with many alpha values or many signals (rows) with one alpha
+# (or pairwise when both are given), returns 2D array with one filtered signal per row
+def exp_filter_batch(z0, alphas):
+    z0 = np.atleast_2d(np.asarray(z0, dtype=float))
+    alphas = np.atleast_1d(np.asarray(alphas, dtype=float))
+    if alphas.shape[0] == 1:
+        return exp_filter_array(z0, alphas[0])
+    z0 = np.broadcast_to(z0, (alphas.shape[0], z0.shape[1]))
+    return np.vstack([exp_filter_array(z0[i], alphas[i]) for i in range(alphas.shape[0])])
+
 # define sliding average filtering algorithm
-def sliding_average(ecg_sequence, winwidth):
-    z0 = ecg_sequence.amp_seq
+def sliding_average(ecg_sequence, winwidth, mode='causal'):
     W0_ms = winwidth
     Ts = cm.CycleModel.Ts
     W0_bin = np.ceil(W0_ms / Ts).astype(int)
+    return sliding_average_array(ecg_sequence.amp_seq, W0_bin, mode)
+
+# sliding average of a raw amplitude array with window width given in bins
+# every output sample is a difference of two cumulative sums, so the cost is O(K) for any width
+# edge handling depends on mode:
+#   'causal' - mean of the last W0_bin samples, shorter (growing) window for the first W0_bin-1 samples
+#   'same'   - window centered on the sample, truncated at both ends of the signal
+#   'valid'  - only fully covered windows, output is W0_bin-1 samples shorter than input
+def sliding_average_array(z0, W0_bin, mode='causal'):
+    return sliding_average_batch(z0, [W0_bin], mode)[0]
+
+# sliding average for a whole set of window widths (in bins), all rows are computed from one cumulative sum
+# with 1D index arrays, so temporaries stay O(K) however many widths are given
+# returns 2D array of shape (widths, samples); in 'valid' mode rows of wider windows are padded with nan
+def sliding_average_batch(z0, W0_bins, mode='causal'):
+    z0 = np.asarray(z0, dtype=float)
+    W0_bins = np.atleast_1d(np.asarray(W0_bins, dtype=int)).ravel()
+    if np.any(W0_bins < 1):
+        raise ValueError('window width must be at least 1 bin')
+    if mode not in ('causal', 'same', 'valid'):
+        raise ValueError(f"unknown mode '{mode}', expected 'causal', 'same' or 'valid'")
     K = z0.shape[0]
-    lmbd = 1 / W0_bin
-    z0_tilda = np.zeros(K)
-    z0_tilda[W0_bin-1] = lmbd * np.sum(z0[0:W0_bin])
-    for k in range(W0_bin, K):
-        z0_tilda[k] = z0_tilda[k-1] + lmbd * (z0[k] - z0[k-1-W0_bin])
-    return z0_tilda
\ No newline at end of file
+    z0_cumsum = np.concatenate(([0], np.cumsum(z0)))
+    k = np.arange(K)
+    if mode == 'valid':
+        k = k[:max(K - W0_bins.min() + 1, 0)]
+    z0_tilda = np.empty((W0_bins.shape[0], k.shape[0]))
+    for row, W0_bin in zip(z0_tilda, W0_bins):
+        if mode == 'causal':
+            k_end = k + 1
+            k_start = np.maximum(k_end - W0_bin, 0)
+        elif mode == 'same':
+            k_start = np.clip(k - (W0_bin - 1) // 2, 0, K)
+            k_end = np.clip(k - (W0_bin - 1) // 2 + W0_bin, 0, K)
+        else:
+            k_start = k
+            k_end = np.minimum(k + W0_bin, K)
+        np.divide(z0_cumsum[k_end] - z0_cumsum[k_start], k_end - k_start, out=row)
+        if mode == 'valid':
+            row[k + W0_bin > K] = np.nan
+    if mode == 'valid' and W0_bins.shape[0] == 1:
+        z0_tilda = z0_tilda[:, :K - W0_bins[0] + 1]
+    return z0_tilda
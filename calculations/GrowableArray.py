@@ -0,0 +1,34 @@
+import numpy as np
+
+# 1D array which grows at its end with amortized O(1) cost per sample
+# capacity is doubled whenever it runs out, so appending M chunks copies every sample O(1) times on average
+class GrowableArray:
+    def __init__(self, initial=None, dtype=float):
+        # initial array is adopted without copying (it may be read-only, e.g. a memory map),
+        # it is copied into a new buffer only on the first growth
+        if initial is None:
+            self.buffer = np.zeros(0, dtype=dtype)
+        else:
+            self.buffer = np.asarray(initial)
+        self.n = self.buffer.shape[0]
+
+    def __len__(self):
+        return self.n
+
+    # filled part of the buffer (a view, it stays valid only until the next growth)
+    @property
+    def data(self):
+        return self.buffer[:self.n]
+
+    # append values at the end
+    def extend(self, values):
+        values = np.asarray(values)
+        if values.shape[0] == 0:
+            return
+        n_new = self.n + values.shape[0]
+        if n_new > self.buffer.shape[0]:
+            buffer = np.empty(max(2 * self.buffer.shape[0], n_new), dtype=np.result_type(self.buffer, values))
+            buffer[:self.n] = self.buffer[:self.n]
+            self.buffer = buffer
+        self.buffer[self.n:n_new] = values
+        self.n = n_new
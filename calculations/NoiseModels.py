@@ -0,0 +1,65 @@
+import functools
+import numpy as np
+
+# models of unit-amplitude noise, every realization is fully defined by the seed
+# uniform, gaussian - white noise; baseline - wander of isoline by slow breathing-like oscillations;
+# powerline50, powerline60 - interference of power line; emg - white noise in bursts of muscle activity
+NOISE_MODELS = ('uniform', 'gaussian', 'baseline', 'powerline50', 'powerline60', 'emg')
+# number of slow oscillations of baseline wander and their frequency range (Hz)
+BASELINE_COMPONENTS = 3
+BASELINE_FREQUENCIES = (0.05, 0.5)
+# frequency range of muscle activity bursts (Hz)
+EMG_BURST_FREQUENCIES = (0.3, 1.5)
+# buffers of whole sequence up to this number of samples are cached, longer sequences are generated by windows
+NOISE_CACHE_MAX_SAMPLES = 2**21
+NOISE_CACHE_SIZE = 8
+
+# white noise of samples start..stop-1, generated block by block, every block from its own generator
+# seeded with (seed, block), so any window of samples is the same as in the whole realization
+def white_noise(draw, seed, start, stop, block):
+    b0, b1 = start // block, (stop - 1) // block + 1
+    noise = np.concatenate([draw(np.random.default_rng([seed, b]), block) for b in range(b0, b1)])
+    return noise[start - b0*block:stop - b0*block]
+
+# random frequencies (Hz) and phases of sinusoids of a model, drawn from a generator seeded with seed only
+def oscillations(seed, count, frequencies):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(*frequencies, count), rng.uniform(0, 2*np.pi, count), rng.uniform(0.5, 1, count)
+
+# sum of sinusoids with given frequencies, phases and weights at time values t (s), normalized to [-1, 1]
+def sum_of_sinusoids(t, f, phi, w):
+    return np.sin(2*np.pi * t[:, None] * f + phi) @ (w / w.sum())
+
+# unit noise of given model for samples start..stop-1 with sampling period Ts (ms)
+# white noise is generated by blocks of size block, oscillating components are evaluated at sample times
+def unit_noise(model, seed, start, stop, Ts, block):
+    if stop <= start:
+        return np.zeros(0)
+    t = np.arange(start, stop) * Ts / 1000
+    if model == 'uniform':
+        return white_noise(lambda rng, size: rng.uniform(-1, 1, size), seed, start, stop, block)
+    if model == 'gaussian':
+        return white_noise(lambda rng, size: rng.standard_normal(size), seed, start, stop, block)
+    if model == 'baseline':
+        return sum_of_sinusoids(t, *oscillations(seed, BASELINE_COMPONENTS, BASELINE_FREQUENCIES))
+    if model in ('powerline50', 'powerline60'):
+        _, phi, _ = oscillations(seed, 1, (0, 1))
+        return np.sin(2*np.pi * int(model[-2:]) * t + phi[0])
+    if model == 'emg':
+        # envelope of bursts is the positive half of a slow sinusoid
+        envelope = np.maximum(sum_of_sinusoids(t, *oscillations(seed, 1, EMG_BURST_FREQUENCIES)), 0)
+        return envelope * white_noise(lambda rng, size: rng.standard_normal(size), seed, start, stop, block)
+    raise ValueError(f'unknown noise model {model}, expected one of {", ".join(NOISE_MODELS)}')
+
+# unit noise of the whole sequence, cached per model, seed and length (read-only, shared between sequences)
+@functools.lru_cache(maxsize=NOISE_CACHE_SIZE)
+def cached_unit_noise(model, seed, length, Ts, block):
+    noise = unit_noise(model, seed, 0, length, Ts, block)
+    noise.flags.writeable = False
+    return noise
+
+# unit noise of samples start..stop-1 of a sequence of given length, cached buffer is used if it's small enough
+def get_unit_noise(model, seed, start, stop, length, Ts, block):
+    if length <= NOISE_CACHE_MAX_SAMPLES:
+        return cached_unit_noise(model, seed, length, Ts, block)[start:stop]
+    return unit_noise(model, seed, start, stop, Ts, block)
@@ -0,0 +1,111 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from multiprocessing import shared_memory
+import numpy as np
+
+import calculations.HausdorffDistance as hd
+
+# time to start a pool of spawned worker processes (s), every worker imports numpy, scipy and the main module
+# (with PyQt6 when started from the UI); workers start at the same time if there are enough cores
+POOL_STARTUP_SECONDS = 1.0
+# number of row blocks per worker process, more blocks give smoother progress and load balancing
+BLOCKS_PER_WORKER = 4
+# interval of checking cancellation while waiting for blocks (s)
+POLL_INTERVAL = 0.05
+
+# point sets of the worker process, attached to shared memory once per process
+_worker = {}
+
+# put point sets into one shared memory block, returns it with row offsets of every point set
+def share_point_sets(point_sets):
+    offsets = np.concatenate(([0], np.cumsum([p.shape[0] for p in point_sets]))).astype(int)
+    shm = shared_memory.SharedMemory(create=True, size=max(int(offsets[-1]) * 2 * 8, 1))
+    points = np.ndarray((offsets[-1], 2), dtype=float, buffer=shm.buf)
+    for p, o0, o1 in zip(point_sets, offsets[:-1], offsets[1:]):
+        points[o0:o1] = p
+    return shm, offsets
+
+# initializer of worker process: views of shared point sets (no copies) and an engine caching KD-trees over them
+def attach_point_sets(name, offsets, max_tile_bytes, kdtree_min_points):
+    shm = shared_memory.SharedMemory(name=name)
+    points = np.ndarray((offsets[-1], 2), dtype=float, buffer=shm.buf)
+    _worker['shm'] = shm
+    _worker['engine'] = hd.HausdorffEngine([points[o0:o1] for o0, o1 in zip(offsets[:-1], offsets[1:])],
+                                           max_tile_bytes, kdtree_min_points)
+
+# distances of rows r0..r1-1 to all later point sets (upper triangle of the matrix)
+def distance_block(r0, r1):
+    engine = _worker['engine']
+    return r0, [np.array([engine.distance(i, j) for j in range(i+1, engine.M)]) for i in range(r0, r1)]
+
+# contiguous row blocks of the upper triangle (from row first on) with about the same number of pairs each
+def row_blocks(M, n_blocks, first=0):
+    pairs = np.cumsum(np.arange(M - 1 - first, 0, -1))
+    if pairs.shape[0] == 0:
+        return []
+    bounds = first + np.searchsorted(pairs, np.linspace(0, pairs[-1], n_blocks + 1)[1:-1], side='left') + 1
+    bounds = np.unique(np.concatenate(([first], bounds, [M - 1])))
+    return [(int(r0), int(r1)) for r0, r1 in zip(bounds[:-1], bounds[1:])]
+
+# whether a pool pays off for work estimated to take given time (s) in the calling process
+def use_pool(seconds, workers, cpus=None):
+    cpus = cpus or multiprocessing.cpu_count()
+    parallel = min(workers, cpus)
+    startup = POOL_STARTUP_SECONDS * max(1.0, workers / cpus)
+    return parallel > 1 and startup + seconds / parallel < seconds
+
+# symmetric M x M matrix of Hausdorff distances computed by row blocks in a pool of worker processes
+# the first row is computed in the calling process and its time estimates the rest, so a pool is started
+# only when the work is expected to outweigh its startup; point sets are placed in shared memory, so tasks
+# pass only row ranges; progress(done, total) is called after every row or block (number of pairs),
+# cancel() is polled while waiting and stops the computation (returns None)
+def distance_matrix_parallel(point_sets, workers=None, progress=None, cancel=None,
+                             max_tile_bytes=hd.MAX_TILE_BYTES, kdtree_min_points=hd.KDTREE_MIN_POINTS):
+    point_sets = [np.asarray(p, dtype=float) for p in point_sets]
+    M = len(point_sets)
+    total = M * (M - 1) // 2
+    workers = workers or multiprocessing.cpu_count()
+    engine = hd.HausdorffEngine(point_sets, max_tile_bytes, kdtree_min_points)
+    done = 0
+    for i in range(M):
+        if cancel is not None and cancel():
+            return None
+        t = time.perf_counter()
+        for j in range(i+1, M):
+            engine.distance(i, j)
+        done += M - 1 - i
+        if progress is not None:
+            progress(done, total)
+        # remaining pairs are estimated from time per pair of the first row
+        if i == 0 and done and use_pool((time.perf_counter() - t) / done * (total - done), workers):
+            break
+    else:
+        return engine.H.copy()
+
+    H = np.nan_to_num(engine.H)
+    shm, offsets = share_point_sets(point_sets)
+    # worker processes are spawned, forking a process with running (e.g. Qt) threads is not safe
+    pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                               initializer=attach_point_sets,
+                               initargs=(shm.name, offsets, max_tile_bytes, kdtree_min_points))
+    try:
+        pending = {pool.submit(distance_block, r0, r1) for r0, r1 in row_blocks(M, workers * BLOCKS_PER_WORKER, first=1)}
+        while pending:
+            finished, pending = wait(pending, timeout=POLL_INTERVAL, return_when=FIRST_COMPLETED)
+            for future in finished:
+                r0, rows = future.result()
+                for i, row in enumerate(rows, start=r0):
+                    H[i, i+1:] = row
+                    H[i+1:, i] = row
+                    done += row.shape[0]
+            if finished and progress is not None:
+                progress(done, total)
+            if cancel is not None and cancel():
+                return None
+    finally:
+        # blocks already running are waited for, the shared memory is still attached to their processes
+        pool.shutdown(wait=True, cancel_futures=True)
+        shm.close()
+        shm.unlink()
+    return H
@@ -0,0 +1,45 @@
+import numpy as np
+
+# min/max decimation pyramid of a uniformly sampled signal (sample i is at time t0 + i * dt)
+# level l keeps minimum and maximum of every block of 2**l samples, so any view of the signal
+# can be drawn with about two points per pixel without losing peaks (e.g. QRS complexes)
+class MinMaxPyramid:
+    def __init__(self, amp, dt=1, t0=0):
+        self.amp = np.asarray(amp)
+        self.dt = dt
+        self.t0 = t0
+        self.N = self.amp.shape[0]
+        # level 0 is the signal itself, every next level halves the number of blocks
+        self.levels = [(self.amp, self.amp)]
+        mins, maxs = self.amp, self.amp
+        while mins.shape[0] > 1:
+            even = mins.shape[0] // 2 * 2
+            next_mins = np.minimum(mins[0:even:2], mins[1:even:2])
+            next_maxs = np.maximum(maxs[0:even:2], maxs[1:even:2])
+            # last block of odd-sized level has only one sample
+            if even < mins.shape[0]:
+                next_mins = np.append(next_mins, mins[-1])
+                next_maxs = np.append(next_maxs, maxs[-1])
+            mins, maxs = next_mins, next_maxs
+            self.levels.append((mins, maxs))
+
+    # time span of the whole signal
+    def extent(self):
+        return self.t0, self.t0 + (self.N - 1) * self.dt
+
+    # points (x, y) to draw the part of signal between x0 and x1 on a plot of given width in pixels
+    # number of points does not depend on the signal length, only on the number of pixels
+    def view(self, x0, x1, pixels):
+        i0 = int(np.clip(np.floor((x0 - self.t0) / self.dt), 0, self.N))
+        i1 = int(np.clip(np.ceil((x1 - self.t0) / self.dt) + 1, i0, self.N))
+        if i1 - i0 <= 2 * pixels:
+            return self.t0 + np.arange(i0, i1) * self.dt, self.amp[i0:i1]
+        # smallest level with at most one block per pixel
+        level = min(int(np.ceil(np.log2((i1 - i0) / pixels))), len(self.levels) - 1)
+        mins, maxs = self.levels[level]
+        b0, b1 = i0 >> level, ((i1 - 1) >> level) + 1
+        # both extremes of a block are drawn as a vertical segment in the middle of the block
+        y = np.empty(2 * (b1 - b0))
+        y[0::2], y[1::2] = mins[b0:b1], maxs[b0:b1]
+        x = self.t0 + (np.repeat(np.arange(b0, b1), 2) + 0.5) * (2**level * self.dt)
+        return x, y
@@ -0,0 +1,160 @@
+import struct
+import time
+import tracemalloc
+import numpy as np
+
+# ECG samples in .txt files are stored as integers scaled by this factor
+TXT_SCALE = 10000
+# sampling rate of .txt ECG files (Hz)
+TXT_FS = 500
+# size of a block of the .txt file parsed at once (bytes)
+TXT_CHUNK_BYTES = 16 * 1024**2
+
+# parse .txt ECG file block by block, yields scaled float arrays so files larger than RAM can be streamed
+# numbers are separated by spaces, line breaks are dropped (same as joining all lines together)
+def iter_txt(path, chunk_bytes=TXT_CHUNK_BYTES, scale=TXT_SCALE):
+    tail = b''
+    with open(path, 'rb') as f:
+        while True:
+            block = f.read(chunk_bytes)
+            if not block:
+                break
+            block = tail + block.replace(b'\n', b'')
+            # last number of the block may continue in the next one, so it is parsed together with it
+            cut = block.rfind(b' ') + 1
+            block, tail = block[:cut], block[cut:]
+            if block.strip():
+                yield np.fromstring(block, dtype=float, sep=' ') / scale
+    if tail.strip():
+        yield np.fromstring(tail, dtype=float, sep=' ') / scale
+
+# read the whole .txt ECG file into a scaled float array
+# if stats dictionary is passed, it is filled with size, time, throughput and peak traced memory of loading
+# (tracing already started elsewhere, e.g. by the performance panel, is left running)
+def load_txt(path, chunk_bytes=TXT_CHUNK_BYTES, stats=None):
+    if stats is not None:
+        started = not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        current, _ = tracemalloc.get_traced_memory()
+        t = time.perf_counter()
+    chunks = list(iter_txt(path, chunk_bytes))
+    data = np.concatenate(chunks) if chunks else np.zeros(0)
+    del chunks
+    if stats is not None:
+        seconds = time.perf_counter() - t
+        peak = tracemalloc.get_traced_memory()[1] - current
+        if started:
+            tracemalloc.stop()
+        with open(path, 'rb') as f:
+            size = f.seek(0, 2)
+        stats.update({'bytes': size, 'samples': data.shape[0], 'seconds': seconds,
+                      'throughput': size / seconds / 1024**2 if seconds else np.inf, # MB/s
+                      'peak_memory': peak})
+    return data
+
+# binary record (.ecg) layout: fixed header, cycle boundaries (uint64, n_cycles + 1 values) and sample payload
+# header: magic, version, payload type code, sampling rate (Hz), scale factor, number of samples, number of cycles
+# samples are stored as raw values, physical amplitude (mV) is raw / scale
+RECORD_MAGIC = b'AECG'
+RECORD_VERSION = 1
+RECORD_HEADER = struct.Struct('<4sHHddQQ')
+RECORD_DTYPES = {0: np.dtype('<f4'), 1: np.dtype('<i2')}
+# payload starts at an offset aligned to this number of bytes
+RECORD_ALIGN = 64
+
+# type code of payload data type
+def record_dtype_code(dtype):
+    dtype = np.dtype(dtype).newbyteorder('<')
+    for code, record_dtype in RECORD_DTYPES.items():
+        if record_dtype == dtype:
+            return code
+    raise ValueError(f'unsupported payload type {dtype}, expected float32 or int16')
+
+# header and cycle boundaries of a binary record, padded so the payload is aligned
+def record_header(Fs, scale, n_samples, code, boundaries):
+    boundaries = np.asarray([] if boundaries is None else boundaries, dtype='<u8')
+    n_cycles = max(boundaries.shape[0] - 1, 0)
+    header = RECORD_HEADER.pack(RECORD_MAGIC, RECORD_VERSION, code, Fs, scale, n_samples, n_cycles)
+    header += boundaries[:n_cycles + 1].tobytes() if n_cycles else b''
+    return header + bytes(-len(header) % RECORD_ALIGN)
+
+# convert raw values to payload type, integers are rounded and checked for overflow
+def to_payload(raw, dtype):
+    if np.issubdtype(dtype, np.integer):
+        raw = np.rint(raw)
+        if raw.size and (raw.min() < np.iinfo(dtype).min or raw.max() > np.iinfo(dtype).max):
+            raise ValueError(f'values do not fit into {dtype}')
+    return raw.astype(dtype)
+
+# save amplitude array (mV) as binary record, boundaries are sample indices where cycles start and end
+def save_record(path, data, Fs, scale=1, boundaries=None, dtype=np.float32):
+    code = record_dtype_code(dtype)
+    data = np.asarray(data)
+    with open(path, 'wb') as f:
+        f.write(record_header(Fs, scale, data.shape[0], code, boundaries))
+        f.write(to_payload(data * scale, RECORD_DTYPES[code]).tobytes())
+
+# one-time conversion of .txt ECG file into binary record, the file is streamed block by block
+# float32 payload stores mV (scale 1), so cycles of the record are opened as memory maps without copying;
+# int16 payload keeps the integers of .txt file as they are (scale 10000) at half the size, but is scaled
+# into a float64 copy whenever samples are read
+def convert_txt(txt_path, path, Fs=TXT_FS, dtype=np.float32, boundaries=None, chunk_bytes=TXT_CHUNK_BYTES):
+    code = record_dtype_code(dtype)
+    scale = TXT_SCALE if np.issubdtype(RECORD_DTYPES[code], np.integer) else 1
+    n_samples = 0
+    with open(path, 'wb') as f:
+        f.write(record_header(Fs, scale, 0, code, boundaries))
+        for chunk in iter_txt(txt_path, chunk_bytes, TXT_SCALE / scale):
+            f.write(to_payload(chunk, RECORD_DTYPES[code]).tobytes())
+            n_samples += chunk.shape[0]
+        # number of samples is known only at the end, so the header is written again
+        f.seek(0)
+        f.write(record_header(Fs, scale, n_samples, code, boundaries))
+    return open_record(path)
+
+# ECG record opened from binary file, samples stay on disk in a read-only memory map until touched
+class EcgRecord:
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            magic, version, code, self.Fs, self.scale, self.n_samples, n_cycles = RECORD_HEADER.unpack(f.read(RECORD_HEADER.size))
+            if magic != RECORD_MAGIC or version != RECORD_VERSION:
+                raise ValueError(f'{path} is not an ECG record of version {RECORD_VERSION}')
+            self.boundaries = np.frombuffer(f.read(8 * (n_cycles + 1)), dtype='<u8').astype(int) if n_cycles else np.zeros(0, dtype=int)
+        self.path = path
+        self.dtype = RECORD_DTYPES[code]
+        offset = RECORD_HEADER.size + 8 * self.boundaries.shape[0]
+        offset += -offset % RECORD_ALIGN
+        # np.memmap cannot map zero bytes
+        if self.n_samples:
+            self.data = np.memmap(path, dtype=self.dtype, mode='r', offset=offset, shape=(self.n_samples,))
+        else:
+            self.data = np.zeros(0, dtype=self.dtype)
+
+    def __len__(self):
+        return self.n_samples
+
+    # amplitude (mV) of samples start..stop-1, float payload with unit scale is returned without copying,
+    # any other payload is scaled into a new float64 array
+    def samples(self, start=0, stop=None):
+        raw = self.data[start:stop]
+        if self.scale == 1 and np.issubdtype(self.dtype, np.floating):
+            return raw
+        return raw / self.scale
+
+    # amplitude of every cycle between stored boundaries (whole record if there are none)
+    def cycles(self):
+        if self.boundaries.shape[0] < 2:
+            return [self.samples()]
+        return [self.samples(b0, b1) for b0, b1 in zip(self.boundaries[:-1], self.boundaries[1:])]
+
+    # amplitude of all cycles one after another (they are contiguous, so it is one view of the record)
+    def cycles_flattened(self):
+        if self.boundaries.shape[0] < 2:
+            return self.samples()
+        return self.samples(self.boundaries[0], self.boundaries[-1])
+
+# open binary ECG record
+def open_record(path):
+    return EcgRecord(path)
@@ -0,0 +1,26 @@
+import time
+import numpy as np
+
+import calculations.CycleSequence as cs
+
+# generator of a synthetic ECG of arbitrary duration as fixed-size (time, amplitude) chunks
+# sequence is lazy and alternation is a repeated pattern, so memory use depends only on chunk_size
+# length is given either as number of beats n or as duration in seconds (rounded up to whole beats)
+# with realtime=True every chunk is emitted only when wall-clock time reaches its last sample
+def stream_sequence(ecg_cycle, n=None, duration=None, chunk_size=4096, alt=0, pattern='AB',
+                    noise_level=0, noise_seed=None, noise_model='uniform', realtime=False):
+    if n is None:
+        if duration is None:
+            raise ValueError('either number of beats n or duration has to be given')
+        n = int(np.ceil(duration * 1000 / ecg_cycle.time[-1]))
+    ecg_sequence = cs.CycleSequence(ecg_cycle, n, noise_seed=noise_seed)
+    ecg_sequence.alternate_t(alt, pattern)
+    ecg_sequence = ecg_sequence.with_noise(noise_level, noise_model)
+    t_start = time.perf_counter()
+    for time_chunk, amp_chunk in ecg_sequence.chunks(chunk_size):
+        if realtime:
+            # sample times are in ms, wall-clock time is in s
+            delay = t_start + time_chunk[-1] / 1000 - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        yield time_chunk, amp_chunk
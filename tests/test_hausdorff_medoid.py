@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+import calculations.HausdorffDistance as hd
+import calculations.Benchmarks as bm
+
+# brute-force medoid: argmin of row sums of the whole distance matrix
+def brute_force_medoid(point_sets):
+    H = hd.HausdorffEngine(point_sets).distance_matrix()
+    return hd.dominant_cycle(H), H.sum(axis=0).min()
+
+# cycles of the default model with different noise levels, as phase point sets
+def random_cycle_sets(seed, count):
+    rng = np.random.default_rng(seed)
+    amplitude = bm.default_cycle(500).amplitude
+    cycles = [amplitude + rng.uniform(0.001, 0.05) * rng.standard_normal(amplitude.shape[0]) for _ in range(count)]
+    return bm.phase_point_sets(cycles)
+
+@pytest.mark.parametrize('seed', range(5))
+def test_medoid_matches_brute_force_on_cycles(seed):
+    point_sets = random_cycle_sets(seed, 12)
+    medoid, medoid_sum = hd.HausdorffEngine(point_sets).medoid()
+    expected, expected_sum = brute_force_medoid(point_sets)
+    assert medoid == expected
+    assert medoid_sum == pytest.approx(expected_sum)
+
+@pytest.mark.parametrize('seed', range(40))
+def test_medoid_matches_brute_force_on_random_point_sets(seed):
+    rng = np.random.default_rng(seed)
+    point_sets = [rng.random((rng.integers(5, 40), 2)) * rng.uniform(0.5, 2) for _ in range(rng.integers(2, 25))]
+    medoid, medoid_sum = hd.HausdorffEngine(point_sets).medoid()
+    expected, expected_sum = brute_force_medoid(point_sets)
+    assert medoid == expected
+    assert medoid_sum == pytest.approx(expected_sum)
+
+def test_medoid_of_single_point_set():
+    assert hd.HausdorffEngine([np.zeros((3, 2))]).medoid() == (0, 0.0)
@@ -0,0 +1,75 @@
+import threading
+import time
+import traceback
+from PyQt6.QtCore import *
+
+# background worker which runs a computation for parameter snapshots outside of the GUI thread
+# only the newest snapshot waits for computation (older waiting ones are dropped), results are
+# posted back to the GUI thread through sig_result together with timing statistics through sig_stats,
+# a failed computation is reported through sig_error (with its traceback) and the worker keeps running
+class ComputeWorker(QObject):
+    sig_result = pyqtSignal(object)
+    sig_stats = pyqtSignal(dict)
+    sig_error = pyqtSignal(str)
+
+    def __init__(self, function, parent=None):
+        super().__init__(parent)
+        self.function = function
+        self.condition = threading.Condition()
+        self.pending = None
+        self.running = True
+        # statistics of computations
+        self.completed = 0
+        self.dropped = 0
+        self.failed = 0
+        self.last_ms = 0.0
+        self.mean_ms = 0.0
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    # queue snapshot for computation, replacing the one that hasn't been started yet
+    def submit(self, snapshot):
+        with self.condition:
+            if self.pending is not None:
+                self.dropped += 1
+            self.pending = snapshot
+            self.condition.notify()
+
+    # stop worker thread after the current computation
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.pending = None
+            self.condition.notify()
+
+    # dictionary of computation statistics (they are updated by worker thread, so read under the lock)
+    def stats(self):
+        with self.condition:
+            return {'completed': self.completed, 'dropped': self.dropped, 'failed': self.failed,
+                    'last_ms': self.last_ms, 'mean_ms': self.mean_ms}
+
+    # loop of worker thread
+    def run(self):
+        while True:
+            with self.condition:
+                while self.pending is None and self.running:
+                    self.condition.wait()
+                if not self.running:
+                    return
+                snapshot, self.pending = self.pending, None
+            t = time.perf_counter()
+            try:
+                result = self.function(snapshot)
+            except Exception:
+                with self.condition:
+                    self.failed += 1
+                self.sig_error.emit(traceback.format_exc())
+                self.sig_stats.emit(self.stats())
+                continue
+            ms = (time.perf_counter() - t) * 1000
+            with self.condition:
+                self.last_ms = ms
+                self.completed += 1
+                self.mean_ms += (self.last_ms - self.mean_ms) / self.completed
+            self.sig_result.emit(result)
+            self.sig_stats.emit(self.stats())
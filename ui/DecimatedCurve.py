@@ -0,0 +1,36 @@
+import calculations.PlotDecimation as dec
+import ui.Profiling as prof
+
+# curve of a plot which draws only the decimated part of a long signal visible in the current view
+class DecimatedCurve:
+    def __init__(self, plot, pen):
+        self.plot = plot
+        self.points = self.plot.plot(pen=pen)
+        self.pyramid = None
+        # redraw every time view range or plot size changes
+        self.plot.getViewBox().sigXRangeChanged.connect(self.update_view)
+        self.plot.getViewBox().sigResized.connect(self.update_view)
+
+    # set uniformly sampled signal with sampling period dt, pyramid is rebuilt only here
+    def setData(self, amp, dt, t0=0):
+        self.setPyramid(dec.MinMaxPyramid(amp, dt, t0))
+
+    # set signal through its already built pyramid (e.g. built in background thread)
+    def setPyramid(self, pyramid):
+        self.pyramid = pyramid
+        self.update_view()
+
+    # draw decimated points of the visible part of signal
+    @prof.timed('DecimatedCurve.update_view', lambda result, self: 0 if self.pyramid is None else self.pyramid.N)
+    def update_view(self):
+        if self.pyramid is None:
+            return
+        view_box = self.plot.getViewBox()
+        # while range follows data, the whole signal is drawn so auto range still sees all of it
+        if view_box.autoRangeEnabled()[0]:
+            x0, x1 = self.pyramid.extent()
+        else:
+            x0, x1 = view_box.viewRange()[0]
+        pixels = max(int(view_box.width()), 1)
+        x, y = self.pyramid.view(x0, x1, pixels)
+        self.points.setData(x, y)
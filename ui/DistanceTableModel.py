@@ -0,0 +1,43 @@
+from PyQt6.QtCore import *
+from PyQt6.QtGui import *
+import numpy as np
+
+# colour of the row and column of dominant cycle
+HIGHLIGHT_COLOR = QColor(255, 143, 143)
+
+# table model reading distances directly from an M x M matrix, cells are formatted only when displayed
+# (nan marks distances skipped by medoid search), row and column of dominant cycle are highlighted
+class DistanceTableModel(QAbstractTableModel):
+    def __init__(self, H, dominant=None, parent=None):
+        super().__init__(parent)
+        self.H = H
+        self.dominant = dominant
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.H.shape[0]
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.H.shape[1]
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        i, j = index.row(), index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            return '-' if np.isnan(self.H[i, j]) else f'{round(float(self.H[i, j]), 6)}'
+        if role == Qt.ItemDataRole.BackgroundRole and self.dominant in (i, j):
+            return HIGHLIGHT_COLOR
+        return None
+
+    # cycles are numbered from 1 in both headers
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole:
+            return str(section + 1)
+        return None
+
+    # replace the matrix (e.g. after the analysis finished) and dominant cycle
+    def set_matrix(self, H, dominant=None):
+        self.beginResetModel()
+        self.H = H
+        self.dominant = dominant
+        self.endResetModel()
@@ -4,12 +4,22 @@ from PyQt6.QtGui import *
 import pyqtgraph as pg
 import numpy as np
 
+import calculations.HausdorffDistance as hd
+import calculations.ParallelHausdorff as ph
+import calculations.ApproximateHausdorff as ah
+import ui.DistanceTableModel as dtm
+
 class DominantCycleWindows:
-    def __init__(self, z, dz):
+    def __init__(self, z, dz, medoid_search=False, approximate=False):
 
         # initializing passed parameters
         self.z = z
         self.dz = dz
+        # in medoid search mode distances which cannot change the dominant cycle are skipped
+        # (usually only a part of them, row sums of noisy cycles are too close to rule many out)
+        self.medoid_search = medoid_search
+        # in approximate mode distances are computed between decimated trajectories in float32
+        self.approximate = approximate
 
         # initializing table widget
 
@@ -32,14 +42,21 @@ class DominantCycleWindows:
         ''')
         vlayout.addWidget(table_title, alignment=Qt.AlignmentFlag.AlignHCenter)
 
-        self.tableWidget = QTableWidget()
+        # error bound and check of medoid of approximate distances (hidden for exact ones)
+        self.approx_label = QLabel()
+        self.approx_label.setVisible(self.approximate)
+        vlayout.addWidget(self.approx_label, alignment=Qt.AlignmentFlag.AlignHCenter)
+
+        # table view reads the distance matrix through a model, no item is created per cell
         self.M = len(z)
-        labels = np.arange(1, self.M+1).astype('str')
-        self.tableWidget.setRowCount(self.M)
-        self.tableWidget.setColumnCount(self.M)
-        self.tableWidget.setHorizontalHeaderLabels(labels)
-        self.tableWidget.setVerticalHeaderLabels(labels)
-        vlayout.addWidget(self.tableWidget)
+        self.table_model = dtm.DistanceTableModel(np.full((self.M, self.M), np.nan))
+        self.tableView = QTableView()
+        self.tableView.setModel(self.table_model)
+        # sections of fixed size, so the view never measures contents of cells
+        for header in (self.tableView.horizontalHeader(), self.tableView.verticalHeader()):
+            header.setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.tableView.horizontalHeader().setDefaultSectionSize(55)
+        vlayout.addWidget(self.tableView)
 
         # initialize graphs
         
@@ -67,57 +84,68 @@ class DominantCycleWindows:
         # perform analysis based on initial conditions
         self.analyze_cycle_phase(self.z, self.dz, self.M)
 
-    # calculate euclidean distance
-    def euclidean_distance(self, x_i, x_j, y_i, y_j):
-        rho = np.sqrt((x_i - x_j)**2 + (y_i - y_j)**2)
-        return rho
-
-    # calculate Hausdorff distance
-    def hausdorff_distance(self, x_i, x_j, y_i, y_j, inverted=0):
-        if not inverted:
-            h = (self.euclidean_distance(x_i, x_j, y_i, y_j)).min(axis=1).max(axis=0)
-        elif inverted:
-            h = (self.euclidean_distance(x_i, x_j, y_i, y_j)).min(axis=0).max(axis=0)
-        return h
-
     # perform linear normalization of passed ECG and its derivative
     def linerar_normalization(self, z, dz, M):
         z_norm = [0] * M
         dz_norm = [0] * M
-        self.phase_plots = [0] * M
         for m in range(M):
             z_min, dz_min = z[m].min(), dz[m].min()
             z_max, dz_max = z[m].max(), dz[m].max()
             z_norm[m] = (z[m] - z_min) / (z_max - z_min)
             dz_norm[m] = (dz[m] - dz_min) / (dz_max - dz_min)
-            self.phase_plots[m] = self.graphWidget.plot(z_norm[m], dz_norm[m], pen=self.pen)
         return z_norm, dz_norm
+
+    # Hausdorff distance matrix computed in worker processes while a progress dialog allows to cancel it
+    # (returns None when cancelled)
+    def compute_distance_matrix(self, point_sets):
+        M = len(point_sets)
+        progress_dialog = QProgressDialog('Computing Hausdorff distances between cycles...', 'Cancel', 0, M * (M-1) // 2)
+        progress_dialog.setWindowTitle('Dominant cycle')
+        progress_dialog.setWindowModality(Qt.WindowModality.ApplicationModal)
+        progress_dialog.setMinimumDuration(500)
+
+        def progress(done, total):
+            progress_dialog.setValue(done)
+            QApplication.processEvents()
+
+        def cancel():
+            QApplication.processEvents()
+            return progress_dialog.wasCanceled()
+
+        H = ph.distance_matrix_parallel(point_sets, progress=progress, cancel=cancel)
+        progress_dialog.close()
+        return H
     
     # define dominant cycle
     def analyze_cycle_phase(self, z, dz, M):
         z_norm, dz_norm = self.linerar_normalization(z, dz, M)
         # Hausdorff distance between all cycles
-        H = np.zeros((M, M))
-        for i in range(H.shape[0]):
-            x_i = z_norm[i].reshape(-1, 1)
-            y_i = dz_norm[i].reshape(-1, 1)
-            for j in range(H.shape[1]):
-                x_j = z_norm[j]
-                y_j = dz_norm[j]
-                h_ij = self.hausdorff_distance(x_i, x_j, y_i, y_j, 0)
-                h_ji = self.hausdorff_distance(x_i, x_j, y_i, y_j, 1)
-                H[i, j] = max(h_ij, h_ji)
-                self.tableWidget.setColumnWidth(j, 55)
-                self.tableWidget.setItem(i, j, QTableWidgetItem(f'{round(H[i,j], 6)}'))
-        H_min = np.argmin(np.sum(H, axis=0))
-
-        # display analysis results on table and graphs
+        point_sets = [hd.to_point_set(z_norm[m], dz_norm[m]) for m in range(M)]
+        if self.approximate:
+            H, bound = ah.approximate_distance_matrix(point_sets)
+            H_min = hd.dominant_cycle(H)
+            approx_medoid, exact_medoid, sample, max_error = ah.check_medoid(point_sets, H)
+            check = 'matches' if approx_medoid == exact_medoid else f'differs (exact one is {exact_medoid + 1})'
+            self.approx_label.setText(f'Approximate distances, error ≤ {bound.max():.2g} '
+                                      f'(observed {max_error:.2g} on a sample of {sample.shape[0]} cycles)\n'
+                                      f'Dominant cycle of the sample {check}')
+        elif self.medoid_search:
+            engine = hd.HausdorffEngine(point_sets)
+            H_min, _ = engine.medoid()
+            H = engine.H
+        else:
+            H = self.compute_distance_matrix(point_sets)
+            if H is None:
+                return
+            H_min = hd.dominant_cycle(H)
+        self.H = H
+
+        # display analysis results on table and graphs, both are updated only once
+        self.table_model.set_matrix(H, H_min)
+
         highlight_pen = pg.mkPen(color="red", width=3, style=Qt.PenStyle.SolidLine)
-        self.phase_plots[H_min].clear()
-        self.phase_plots.pop(H_min)
+        # dominant cycle is plotted last, so it stays on top of the others
+        self.phase_plots = [self.graphWidget.plot(z_norm[m], dz_norm[m], pen=self.pen) for m in range(M) if m != H_min]
         self.phase_plots.append(self.graphWidget.plot(z_norm[H_min], dz_norm[H_min], pen=highlight_pen, name='Dominant cycle'))
-        for m in range(self.M):
-            self.tableWidget.item(m, H_min).setBackground(QColor(255,143,143))
-            self.tableWidget.item(H_min, m).setBackground(QColor(255,143,143))
         self.graph_subwindow.show()
         self.table_subwindow.show()
@@ -1,11 +1,12 @@
 from PyQt6.QtCore import *
 from PyQt6.QtWidgets import *
 import pyqtgraph as pg
-import numpy as np
 import matplotlib.pyplot as plt
 
 import calculations.CycleSequence as cs
-import calculations.FilteringAlgorithms as fa
+import calculations.FilterPipeline as fp
+import ui.DecimatedCurve as dc
+import ui.Profiling as prof
 
 # window of ECG signal filtering
 class FilterWindow(QWidget):
@@ -23,6 +24,11 @@ class FilterWindow(QWidget):
         # receiving parameters from the sequence window
         self.noisy_ecg_sequence = ecg_sequence
         self.Ts = Ts
+        # time sequence is shared by all filtered sequences
+        self.time_seq = self.noisy_ecg_sequence.time_seq
+        # chain of enabled filters, outputs of its stages are cached
+        self.pipeline = fp.FilterPipeline()
+        self.pipeline.set_input(self.noisy_ecg_sequence.amp_seq)
 
         # initialize grid for the window
         grid = QGridLayout()
@@ -39,7 +45,7 @@ class FilterWindow(QWidget):
         self.graphWidget.setMouseEnabled(y=False)
 
         pen = pg.mkPen(color="k", width=2, style=Qt.PenStyle.SolidLine)
-        self.points = self.graphWidget.plot(pen=pen)
+        self.points = dc.DecimatedCurve(self.graphWidget, pen)
 
         grid.addWidget(self.graphWidget, 0, 0, 1, 3)
 
@@ -109,23 +115,21 @@ class FilterWindow(QWidget):
 
         grid.addWidget(self.winwidth_group, 1, 1)
 
-        # initializing radio buttons for switching types of filtering
+        # initializing check boxes for chaining types of filtering (exponential filtering goes first)
         self.filter_group = QGroupBox()
-        self.filter_group.setTitle('Filtering method')
+        self.filter_group.setTitle('Filtering methods')
 
         self.filter_vlayout = QVBoxLayout()
         self.filter_group.setLayout(self.filter_vlayout)
 
-        self.exp_filter = QRadioButton('Exponential')
+        self.exp_filter = QCheckBox('Exponential')
         self.exp_filter.type = 'exponential'
-        self.exp_filter.toggled.connect(self.on_clicked)
+        self.exp_filter.toggled.connect(self.set_slider_modes)
         self.filter_vlayout.addWidget(self.exp_filter)
 
-        self.moving_avg = QRadioButton('Sliding average')
+        self.moving_avg = QCheckBox('Sliding average')
         self.moving_avg.type = 'sliding_average'
-        self.moving_avg.toggled.connect(self.on_clicked)
-        self.filter_vlayout.addWidget(self.moving_avg)
-
+        self.moving_avg.toggled.connect(self.set_slider_modes)
         self.filter_vlayout.addWidget(self.moving_avg)
 
         grid.addWidget(self.filter_group, 1, 2)
@@ -133,42 +137,56 @@ class FilterWindow(QWidget):
         self.on_update(self.noisy_ecg_sequence)
 
     # update points of the graph every time any slider/radiobutton emitted a Qt signal
+    @prof.timed('FilterWindow.on_update', lambda result, self, ecg_sequence: len(ecg_sequence))
     def on_update(self, ecg_sequence):
         """ Update the plot with the current input values """
-        self.points.setData(ecg_sequence.time_seq / 1000, ecg_sequence.amp_seq)
+        self.points.setData(ecg_sequence.amp_seq, self.Ts / 1000)
 
     # perform sliding average filtering based on scrapped parameters from window width slider
+    @prof.timed('FilterWindow.update_winwidth', lambda result, self: len(self.noisy_ecg_sequence))
     def update_winwidth(self):
         winwidth = self.slider_winwidth.value()
         self.slider_winwidth_value.setText(f'[{winwidth}]')
-        filtered_amp_seq = fa.sliding_average(self.noisy_ecg_sequence, winwidth)
-        filtered_ecg_sequence = cs.CycleSequence(time_seq=self.noisy_ecg_sequence.time_seq,
-                                                 amp_seq=filtered_amp_seq)
-        self.on_update(filtered_ecg_sequence)
+        if not self.moving_avg.isChecked():
+            return
+        i = len(self.pipeline) - 1
+        self.pipeline.set_params(i, winwidth=winwidth)
+        # every slider width is filtered at once on first use (if all of them fit into cache),
+        # so moving the slider is only a lookup
+        winwidths = range(self.slider_winwidth.minimum(), self.slider_winwidth.maximum() + 1)
+        self.pipeline.sweep(i, 'winwidth', winwidths)
+        self.update_filtered()
 
     # perform exponential filtering based on scrapped parameters from alpha value slider
+    @prof.timed('FilterWindow.update_alpha', lambda result, self: len(self.noisy_ecg_sequence))
     def update_alpha(self):
         alpha = self.slider_alpha.value() / 100
         self.slider_alpha_value.setText(f'[{alpha}]')
-        filtered_amp_seq = fa.exp_filter(self.noisy_ecg_sequence, alpha)
-        filtered_ecg_sequence = cs.CycleSequence(time_seq=self.noisy_ecg_sequence.time_seq,
-                                                 amp_seq=filtered_amp_seq)
+        if not self.exp_filter.isChecked():
+            return
+        self.pipeline.set_params(0, alpha=alpha)
+        self.update_filtered()
+
+    # run filtering chain (only stages after the last changed one are recomputed) and show its output
+    def update_filtered(self):
+        if len(self.pipeline) == 0:
+            self.on_update(self.noisy_ecg_sequence)
+            return
+        filtered_ecg_sequence = cs.CycleSequence(time_seq=self.time_seq,
+                                                 amp_seq=self.pipeline.run())
         self.on_update(filtered_ecg_sequence)
 
-    # set the only active radiobutton with self.active_radio attribute for the window
-    def on_clicked(self):
-        radio = self.sender()
-        if radio.isChecked():
-            self.active_radio = radio
-            self.set_slider_modes()
-
-    # activate neccessary filtering method and set the other one as disabled
+    # build filtering chain of checked methods and enable their sliders
     def set_slider_modes(self):
-        if self.active_radio.type == 'exponential':
-            self.slider_alpha.setEnabled(True)
-            self.slider_winwidth.setEnabled(False)
-            self.update_alpha()
-        elif self.active_radio.type == 'sliding_average':
-            self.slider_winwidth.setEnabled(True)
-            self.slider_alpha.setEnabled(False)
+        self.slider_alpha.setEnabled(self.exp_filter.isChecked())
+        self.slider_winwidth.setEnabled(self.moving_avg.isChecked())
+        stages = []
+        if self.exp_filter.isChecked():
+            stages.append(('exp_filter', {'alpha': self.slider_alpha.value() / 100}))
+        if self.moving_avg.isChecked():
+            stages.append(('sliding_average', {'winwidth': self.slider_winwidth.value(), 'Ts': self.Ts}))
+        self.pipeline.set_stages(stages)
+        if self.moving_avg.isChecked():
             self.update_winwidth()
+        else:
+            self.update_filtered()
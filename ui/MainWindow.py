@@ -8,6 +8,9 @@ import calculations.CycleModel as cm
 import ui.SequenceWindow as sw
 import calculations.CycleSequence as cs
 import ui.PhaseWindow as pw
+import calculations.RecordFiles as rf
+import ui.Profiling as prof
+import ui.PerformancePanel as perf
 
 # main window of ECG cycle
 class MainWindow(QMainWindow):
@@ -69,6 +72,19 @@ class MainWindow(QMainWindow):
         menu_file.addAction(exit_action)
         exit_action.triggered.connect(self.exit_window)
 
+        # initialize dockable panel with timings of UI updates (hidden until toggled in View menu)
+        self.performance_dock = QDockWidget('Performance', self)
+        self.performance_dock.setWidget(perf.PerformancePanel())
+        self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, self.performance_dock)
+        self.performance_dock.hide()
+
+        menu_view = QMenu('&View', self)
+        menu.addMenu(menu_view)
+        performance_action = self.performance_dock.toggleViewAction()
+        performance_action.setText('&Performance')
+        performance_action.setShortcut('Ctrl+Shift+P')
+        menu_view.addAction(performance_action)
+
         # initialize grid for the window
         grid = QGridLayout()
         self.widget.setLayout(grid)
@@ -313,6 +329,7 @@ class MainWindow(QMainWindow):
         self.ecg_cycle.waves[self.active_radio.wave][index] = data
 
     # update points of the graph every time any slider/radiobutton emitted a Qt signal
+    @prof.timed('MainWindow.on_update', lambda result, self: self.ecg_cycle.amplitude.shape[0])
     def on_update(self):
         """ Update the plot with the current input values """
         self.ecg_cycle.construct_cycle()
@@ -439,18 +456,39 @@ class MainWindow(QMainWindow):
         if data is not None:
             self.show_phase_window(data, self.sender().cycle_flag)
 
-    # open a .txt signal file
+    # read a .txt signal file or a binary ECG record (memory-mapped, list of cycles if it stores cycle boundaries)
+    # cycles of a record are also kept as one view of the record, so they are never concatenated into a copy
+    def read_file(self, file):
+        self.opened_flattened = None
+        if file.endswith('.ecg'):
+            record = rf.open_record(file)
+            self.opened_Fs = record.Fs
+            cycles = record.cycles()
+            if len(cycles) > 1:
+                self.opened_flattened = record.cycles_flattened()
+                return cycles
+            return cycles[0]
+        self.opened_Fs = rf.TXT_FS
+        # throughput and peak memory of loading are shown in status bar and kept in performance panel
+        stats = {}
+        data = rf.load_txt(file, stats=stats)
+        prof.profiler.record('RecordFiles.load_txt', stats['seconds'] * 1000, stats['samples'], stats['peak_memory'])
+        self.statusBar().showMessage(f"Loaded {stats['samples']} samples ({stats['bytes'] / 1024**2:.1f} MB) "
+                                     f"in {stats['seconds']:.2f} s, {stats['throughput']:.1f} MB/s, "
+                                     f"peak memory {stats['peak_memory'] / 1024**2:.1f} MB")
+        return data
+
+    # open a .txt signal file or a binary ECG record
     def open_file(self):
-        file, check = QFileDialog.getOpenFileName(self, "Прочитати сигнал ЕКГ", "", "Текстовий файл (*.txt)")
+        file, check = QFileDialog.getOpenFileName(self, "Прочитати сигнал ЕКГ", "", "Текстовий файл (*.txt);;Запис ЕКГ (*.ecg)")
+        if check:
+            return MainWindow.read_file(self, file)
+
+    # open several .txt signal files or binary ECG records at once, returns list of their data
+    def open_files(self):
+        files, check = QFileDialog.getOpenFileNames(self, "Прочитати сигнали ЕКГ", "", "Текстовий файл (*.txt);;Запис ЕКГ (*.ecg)")
         if check:
-            f = open(file, 'r')
-            with f:
-                data = f.read()
-            data = data.replace('\n', '').split(' ')
-            data = [s.replace(' ', '') for s in data]
-            data = [s for s in data if s!='']
-            data = np.asarray(data).astype(float) / 10000
-            return data
+            return [MainWindow.read_file(self, file) for file in files]
 
     # create sequence window when pressed Generate button
     def show_sequence_window(self):
@@ -459,5 +497,5 @@ class MainWindow(QMainWindow):
 
     # create phase window when opened a .txt signal file in menu
     def show_phase_window(self, data, cycle_flag):
-        self.window_phase = pw.PhaseWindow(data, cycle_flag)
+        self.window_phase = pw.PhaseWindow(data, cycle_flag, self.opened_Fs, self.opened_flattened)
         self.window_phase.show()
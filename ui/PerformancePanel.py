@@ -0,0 +1,77 @@
+from PyQt6.QtCore import *
+from PyQt6.QtWidgets import *
+
+from ui.Profiling import profiler
+
+# interval of refreshing statistics while the panel is visible (ms)
+PANEL_REFRESH_MS = 500
+
+# panel with rolling latency percentiles, processed samples and allocations of every timed UI stage
+class PerformancePanel(QWidget):
+    columns = ['Stage', 'Calls', 'p50 (ms)', 'p90 (ms)', 'p99 (ms)', 'Max (ms)', 'Samples', 'Allocated (KB)']
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+
+        vlayout = QVBoxLayout()
+        self.setLayout(vlayout)
+
+        self.tableWidget = QTableWidget()
+        self.tableWidget.setColumnCount(len(self.columns))
+        self.tableWidget.setHorizontalHeaderLabels(self.columns)
+        self.tableWidget.verticalHeader().setVisible(False)
+        self.tableWidget.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        vlayout.addWidget(self.tableWidget)
+
+        hlayout = QHBoxLayout()
+        vlayout.addLayout(hlayout)
+
+        self.allocations = QCheckBox('Track allocations')
+        self.allocations.toggled.connect(profiler.set_track_allocations)
+        hlayout.addWidget(self.allocations)
+
+        self.clear_button = QPushButton('Clear')
+        self.clear_button.clicked.connect(self.clear)
+        hlayout.addWidget(self.clear_button)
+
+        self.export_button = QPushButton('Export...')
+        self.export_button.clicked.connect(self.export)
+        hlayout.addWidget(self.export_button)
+
+        # statistics are refreshed only while the panel is shown
+        self.timer = QTimer(self)
+        self.timer.setInterval(PANEL_REFRESH_MS)
+        self.timer.timeout.connect(self.refresh)
+
+    def showEvent(self, event):
+        self.refresh()
+        self.timer.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
+
+    # fill the table with current statistics
+    def refresh(self):
+        summary = profiler.summary()
+        self.tableWidget.setRowCount(len(summary))
+        for row, (stage, stats) in enumerate(summary.items()):
+            alloc = stats['alloc_bytes']
+            values = [stage, str(stats['calls']), f"{stats['p50_ms']:.2f}", f"{stats['p90_ms']:.2f}",
+                      f"{stats['p99_ms']:.2f}", f"{stats['max_ms']:.2f}",
+                      '-' if stats['samples'] is None else str(stats['samples']),
+                      '-' if alloc is None else f'{alloc / 1024:.1f}']
+            for column, value in enumerate(values):
+                self.tableWidget.setItem(row, column, QTableWidgetItem(value))
+        self.tableWidget.resizeColumnsToContents()
+
+    def clear(self):
+        profiler.clear()
+        self.refresh()
+
+    # save collected statistics for offline analysis
+    def export(self):
+        file, check = QFileDialog.getSaveFileName(self, 'Export timings', 'timings.json', 'JSON (*.json);;CSV (*.csv)')
+        if check:
+            profiler.export(file)
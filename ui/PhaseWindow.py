@@ -7,10 +7,16 @@ import numpy as np
 import ui.MainWindow as mw
 import calculations.CycleSequence as cs
 import ui.DominantCycleWindows as dcw
+import calculations.Differentiation as dif
+import calculations.CycleSegmentation as seg
+import calculations.GrowableArray as ga
+import calculations.DensityMap as dm
+import ui.DecimatedCurve as dc
+import ui.Profiling as prof
 
 # window of a phase plane of opened ECG signal
 class PhaseWindow(QMainWindow):
-    def __init__(self, data, cycle_flag, parent=None):
+    def __init__(self, data, cycle_flag, Fs=500, z_flattened=None, parent=None):
         super().__init__(parent)
 
         # window styling
@@ -45,10 +51,15 @@ class PhaseWindow(QMainWindow):
         self.setCentralWidget(self.widget)
         self.setWindowTitle('Opened ECG')
 
-        # initialize ECG sequence
-        self.z = [data]
-        self.z_flattened = data
+        # initialize ECG sequence (list of cycles if data was opened from a record with cycle boundaries,
+        # then z_flattened is the view of record with all of them)
+        self.Fs = Fs # sampling frequency in Hz
         self.cycle_flag = cycle_flag
+        # phase and pseudophase trajectories can be drawn as density maps instead of polylines
+        self.density_flag = False
+        self.phase_density = dm.DensityMap()
+        self.pseudophase_density = dm.DensityMap()
+        self.set_cycles(data if isinstance(data, list) else [data], z_flattened)
 
         # initialize menu bar
         menu = QMenuBar(self)
@@ -60,11 +71,39 @@ class PhaseWindow(QMainWindow):
         menu.addSeparator()
         menu_analyze = QMenu('&Analyze', self)
         menu.addMenu(menu_analyze)
+        menu_view = QMenu('&View', self)
+        menu.addMenu(menu_view)
 
-        cycle_action = QAction("&Define dominant cycle", menu)
-        menu_analyze.addAction(cycle_action)
-        cycle_action.setEnabled(self.cycle_flag)
-        cycle_action.triggered.connect(self.show_dominant_cycle_windows)
+        self.density_action = QAction("&Density map", menu)
+        menu_view.addAction(self.density_action)
+        self.density_action.setCheckable(True)
+        self.density_action.toggled.connect(self.set_density_mode)
+
+        self.split_action = QAction("&Split into cycles", menu)
+        menu_analyze.addAction(self.split_action)
+        self.split_action.setEnabled(not self.cycle_flag)
+        self.split_action.triggered.connect(self.split_into_cycles)
+
+        self.cycle_action = QAction("&Define dominant cycle", menu)
+        menu_analyze.addAction(self.cycle_action)
+        self.cycle_action.setEnabled(self.cycle_flag)
+        self.cycle_action.medoid_search = False
+        self.cycle_action.approximate = False
+        self.cycle_action.triggered.connect(self.show_dominant_cycle_windows)
+
+        self.medoid_action = QAction("Define dominant cycle (exact, &skips some distances)", menu)
+        menu_analyze.addAction(self.medoid_action)
+        self.medoid_action.setEnabled(self.cycle_flag)
+        self.medoid_action.medoid_search = True
+        self.medoid_action.approximate = False
+        self.medoid_action.triggered.connect(self.show_dominant_cycle_windows)
+
+        self.approximate_action = QAction("Define dominant cycle (&approximate)", menu)
+        menu_analyze.addAction(self.approximate_action)
+        self.approximate_action.setEnabled(self.cycle_flag)
+        self.approximate_action.medoid_search = False
+        self.approximate_action.approximate = True
+        self.approximate_action.triggered.connect(self.show_dominant_cycle_windows)
 
         # initialize grid for the window
         grid = QGridLayout()
@@ -75,17 +114,17 @@ class PhaseWindow(QMainWindow):
         self.widget.pen = pg.mkPen(color="k", width=2, style=Qt.PenStyle.SolidLine)
         
         self.widget.time_domain_plot = self.widget.graphLayout.addPlot(row=0, col=0, rowspan=3, colspan=1)
-        self.widget.time_domain_points = self.widget.time_domain_plot.plot(pen=self.widget.pen)
+        self.widget.time_domain_points = dc.DecimatedCurve(self.widget.time_domain_plot, self.widget.pen)
         self.widget.time_domain_plot.setTitle('Time domain', color='black')
         self.widget.time_domain_plot.setLabel(axis='bottom', text='Time (s)', color='black')
         self.widget.time_domain_plot.setLabel(axis='left', text='Amplitude (mV)', color='black')
         self.widget.time_domain_plot.showGrid(x=True, y=True, alpha=1)
 
         # initialize add cycle button
-        add_cycle_button = QPushButton('+')
-        add_cycle_button.setMaximumWidth(25)
-        add_cycle_button.setMaximumHeight(25)
-        add_cycle_button.setStyleSheet('''
+        self.add_cycle_button = QPushButton('+')
+        self.add_cycle_button.setMaximumWidth(25)
+        self.add_cycle_button.setMaximumHeight(25)
+        self.add_cycle_button.setStyleSheet('''
         QPushButton {
             background-color: #007AD9;
             font-size: 20px;
@@ -106,19 +145,20 @@ class PhaseWindow(QMainWindow):
             border-color: #555555;
         }
         ''')
-        add_cycle_button.setToolTip('Add cycle')
-        add_cycle_button.clicked.connect(self.add_cycle)
-        add_cycle_button.setEnabled(self.cycle_flag)
+        self.add_cycle_button.setToolTip('Add cycle')
+        self.add_cycle_button.clicked.connect(self.add_cycle)
+        self.add_cycle_button.setEnabled(self.cycle_flag)
 
         # mounting add cycle button into graph
         proxy = QGraphicsProxyWidget()
-        proxy.setWidget(add_cycle_button)
+        proxy.setWidget(self.add_cycle_button)
         self.widget.graphLayout.addItem(proxy, 1, 1)
 
         # initialize graph
 
         self.widget.phase_plot = self.widget.graphLayout.addPlot(row=3, col=0, colspan=2)
         self.widget.phase_points = self.widget.phase_plot.plot(pen=self.widget.pen)
+        self.widget.phase_image = self.add_density_image(self.widget.phase_plot)
         self.widget.phase_plot.setTitle('Phase domain', color='black')
         self.widget.phase_plot.setLabel(axis='bottom', text='z(t)', color='black')
         self.widget.phase_plot.setLabel(axis='left', text="z '(t)", color='black')
@@ -126,6 +166,7 @@ class PhaseWindow(QMainWindow):
 
         self.widget.pseudophase_plot = self.widget.graphLayout.addPlot(row=4, col=0, colspan=2)
         self.widget.pseudophase_points = self.widget.pseudophase_plot.plot(pen=self.widget.pen)
+        self.widget.pseudophase_image = self.add_density_image(self.widget.pseudophase_plot)
         self.widget.pseudophase_plot.setTitle('Pseudophase domain', color='black')
         self.widget.pseudophase_plot.setLabel(axis='bottom', text='z(t)', color='black')
         self.widget.pseudophase_plot.setLabel(axis='left', text="z(t-𝜏)", color='black')
@@ -172,6 +213,7 @@ class PhaseWindow(QMainWindow):
         self.on_update()
     
     # update points of the graph every time a new cycle is added
+    @prof.timed('PhaseWindow.on_update', lambda result, self: self.z_flattened.shape[0])
     def on_update(self):
         """ Update the plots with the current input values """
         self.update_time_domain()
@@ -179,40 +221,82 @@ class PhaseWindow(QMainWindow):
         self.update_pseudophase_domain()
 
     # update points of the time domain graph
+    @prof.timed('PhaseWindow.update_time_domain', lambda result, self: self.z_flattened.shape[0])
     def update_time_domain(self):
-        Fs = 500
-        Ts = 1 / Fs
-        N = self.z_flattened.shape[0]
-        time_seq = np.arange(0, N) * Ts
-        self.widget.time_domain_points.setData(time_seq,
-                                               self.z_flattened)
+        Ts = 1 / self.Fs
+        self.widget.time_domain_points.setData(self.z_flattened, Ts)
     
     # update points of the phase domain graph
+    @prof.timed('PhaseWindow.update_phase_domain', lambda result, self: self.z_flattened.shape[0])
     def update_phase_domain(self):
-        self.dz = self.compute_derivative(self.z)
-        self.dz_flattened = np.hstack(np.asarray(self.dz, dtype='object')).astype('float64')
-        self.widget.phase_points.setData(self.z_flattened, self.dz_flattened)
+        if self.density_flag:
+            self.set_density_image(self.widget.phase_image, self.phase_density)
+        else:
+            self.widget.phase_points.setData(self.z_flattened, self.dz_flattened)
 
     # update points of the pseudophase domain graph
+    @prof.timed('PhaseWindow.update_pseudophase_domain', lambda result, self: self.z_flattened.shape[0])
     def update_pseudophase_domain(self):
+        if self.density_flag:
+            self.set_density_image(self.widget.pseudophase_image, self.pseudophase_density, self.tau)
+            return
         N = self.z_flattened.shape[0]
         zt = self.z_flattened[0:N-self.tau]
         z_tau = self.z_flattened[self.tau:N]
         self.widget.pseudophase_points.setData(zt, z_tau)
     
-    # compute 1st-order Lagrange derivative
-    def compute_derivative(self, z):
-        safe_border = np.array([0, 0, 0])
-        M = len(z)
-        dz = [0] * M
-        for m in range(M):
-            temp_z = np.concatenate([safe_border, z[m], safe_border])
-            K = len(z[m])
-            dz[m] = np.zeros(K)
-            for k in range(3, K-3):
-                dz[m][k-3] = (1 / 60) * (temp_z[k+3] - 9*temp_z[k+2] + 45*temp_z[k+1] // 
-                                        - 45*temp_z[k-1] + 9*temp_z[k-2] - temp_z[k-3])
-        return dz
+    # replace all cycles, samples and derivatives of cycles are kept in growable buffers
+    # a single cycle (or an already flattened sequence) is adopted by the buffer without copying
+    def set_cycles(self, cycles, z_flattened=None):
+        self.z = list(cycles)
+        self.dz, dz_flattened = dif.lagrange_derivative_cycles(self.z)
+        if z_flattened is None:
+            z_flattened = self.z[0] if len(self.z) == 1 else np.concatenate(self.z)
+        self.z_buffer = ga.GrowableArray(z_flattened)
+        self.dz_buffer = ga.GrowableArray(dz_flattened)
+        self.z_flattened, self.dz_flattened = self.z_buffer.data, self.dz_buffer.data
+        if self.density_flag:
+            self.phase_density.set_data(self.z_flattened, self.dz_flattened)
+            self.pseudophase_density.set_data(self.z_flattened)
+
+    # append cycles to the end of sequence, only the new cycles are derived and copied into buffers
+    def append_cycles(self, cycles):
+        dz, dz_flattened = dif.lagrange_derivative_cycles(cycles)
+        self.z.extend(cycles)
+        self.dz.extend(dz)
+        self.z_buffer.extend(np.concatenate(cycles))
+        self.dz_buffer.extend(dz_flattened)
+        self.z_flattened, self.dz_flattened = self.z_buffer.data, self.dz_buffer.data
+        if self.density_flag:
+            self.phase_density.update(self.z_flattened, self.dz_flattened)
+            self.pseudophase_density.update(self.z_flattened)
+
+    # image item of a density map under the curve of a plot (hidden until density mode is on)
+    # bins visited more often are darker, empty bins are left white like the background
+    def add_density_image(self, plot):
+        image = pg.ImageItem()
+        image.setColorMap(pg.ColorMap([0, 1], [(255, 255, 255), (0, 0, 0)]))
+        image.setVisible(False)
+        plot.addItem(image)
+        return image
+
+    # draw a density map of trajectory, drawing cost depends only on the number of bins
+    def set_density_image(self, image, density, lag=0):
+        image.setImage(density.image(lag), autoLevels=True)
+        image.setRect(*density.rect())
+
+    # switch phase and pseudophase graphs between polylines and density maps
+    def set_density_mode(self, checked):
+        self.density_flag = checked
+        if checked:
+            self.phase_density.set_data(self.z_flattened, self.dz_flattened)
+            self.pseudophase_density.set_data(self.z_flattened)
+            self.widget.phase_points.setData([], [])
+            self.widget.pseudophase_points.setData([], [])
+        for image in (self.widget.phase_image, self.widget.pseudophase_image):
+            image.setVisible(checked)
+        self.update_phase_domain()
+        self.update_pseudophase_domain()
 
     # rebuild pseudophase graph based on scrapped parameters from tau slider 
     def update_tau(self):
@@ -220,15 +304,37 @@ class PhaseWindow(QMainWindow):
         self.widget.slider_tau_value.setText(f'[{self.widget.slider_tau.value()}]')
         self.update_pseudophase_domain()
         
+    # split opened sequence into cycles by detected R peaks, so dominant cycle can be defined
+    # cycles are views into the opened signal, incomplete beats at both ends are left out
+    def split_into_cycles(self):
+        cycles, boundaries = seg.segment_cycles(self.z_flattened, self.Fs)
+        if len(cycles) < 2:
+            QMessageBox.warning(self, 'Split into cycles', 'Less than two cycles were found in the signal.')
+            return
+        self.set_cycles(cycles, self.z_flattened[boundaries[0]:boundaries[-1]])
+        self.cycle_flag = True
+        self.split_action.setEnabled(False)
+        self.cycle_action.setEnabled(True)
+        self.medoid_action.setEnabled(True)
+        self.approximate_action.setEnabled(True)
+        self.add_cycle_button.setEnabled(True)
+        self.on_update()
+
     # create dominant cycle window when pressed Define dominant cycle option
     def show_dominant_cycle_windows(self):
-        self.w_new = dcw.DominantCycleWindows(self.z, self.dz)
+        self.w_new = dcw.DominantCycleWindows(self.z, self.dz, self.sender().medoid_search, self.sender().approximate)
     
-    # concatenate a cycle from .txt file to the end of existing sequence of cycles (n>=1)
+    # concatenate cycles from selected files to the end of existing sequence of cycles (n>=1)
+    # all selected files are read first, then derived and appended in one pass
     def add_cycle(self):
-        cycle = mw.MainWindow.open_file(self=self)
-        if cycle is None:
+        data = mw.MainWindow.open_files(self=self)
+        if not data:
             return
-        self.z.append(cycle)
-        self.z_flattened = np.hstack(np.asarray(self.z, dtype='object')).astype('float64')
+        cycles = []
+        for cycle in data:
+            if isinstance(cycle, list):
+                cycles.extend(cycle)
+            else:
+                cycles.append(cycle)
+        self.append_cycles(cycles)
         self.on_update()
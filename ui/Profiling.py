@@ -0,0 +1,132 @@
+import collections
+import csv
+import functools
+import inspect
+import json
+import threading
+import time
+import tracemalloc
+import numpy as np
+
+# number of the latest calls of every stage kept for rolling statistics
+PROFILE_WINDOW = 200
+
+# collector of timings of UI update stages: latency, number of processed samples and allocated memory per call
+# allocations are traced with tracemalloc only when enabled, since tracing slows every allocation down
+# (peaks are approximate when stages run at the same time in different threads)
+class Profiler:
+    def __init__(self, window=PROFILE_WINDOW):
+        self.enabled = True
+        self.track_allocations = False
+        self.window = window
+        self.lock = threading.Lock()
+        self.clear()
+
+    # drop all collected records
+    def clear(self):
+        with self.lock:
+            # stage -> deque of (time since start (s), latency (ms), samples, allocated bytes)
+            self.records = collections.defaultdict(lambda: collections.deque(maxlen=self.window))
+            self.calls = collections.Counter()
+            self.t_start = time.perf_counter()
+
+    # start or stop tracing of allocations
+    def set_track_allocations(self, track):
+        if track and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        elif not track and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.track_allocations = track
+
+    def record(self, stage, ms, samples=None, nbytes=None):
+        with self.lock:
+            self.records[stage].append((time.perf_counter() - self.t_start, ms,
+                                        None if samples is None else int(samples), nbytes))
+            self.calls[stage] += 1
+
+    # rolling statistics of every stage over its latest calls
+    def summary(self):
+        with self.lock:
+            records = {stage: list(stage_records) for stage, stage_records in self.records.items()}
+            calls = dict(self.calls)
+        summary = {}
+        for stage, stage_records in sorted(records.items()):
+            ms = np.array([r[1] for r in stage_records])
+            samples = [r[2] for r in stage_records if r[2] is not None]
+            nbytes = [r[3] for r in stage_records if r[3] is not None]
+            p50, p90, p99 = np.percentile(ms, [50, 90, 99])
+            summary[stage] = {'calls': calls[stage], 'p50_ms': float(p50), 'p90_ms': float(p90), 'p99_ms': float(p99),
+                              'max_ms': float(ms.max()),
+                              'samples': samples[-1] if samples else None,
+                              'alloc_bytes': int(np.median(nbytes)) if nbytes else None}
+        return summary
+
+    # save summary and every kept record to .json file or records only to .csv file
+    def export(self, path):
+        with self.lock:
+            records = {stage: list(stage_records) for stage, stage_records in self.records.items()}
+        if path.endswith('.csv'):
+            with open(path, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(['stage', 'time_s', 'latency_ms', 'samples', 'alloc_bytes'])
+                for stage, stage_records in records.items():
+                    writer.writerows([stage, *r] for r in stage_records)
+        else:
+            fields = ['time_s', 'latency_ms', 'samples', 'alloc_bytes']
+            with open(path, 'w') as f:
+                json.dump({'summary': self.summary(),
+                           'records': {stage: [dict(zip(fields, r)) for r in stage_records]
+                                       for stage, stage_records in records.items()}}, f, indent=2)
+
+# profiler shared by all windows
+profiler = Profiler()
+
+# stack of allocation frames [traced memory at start, highest peak seen] of timed stages running in a thread
+_frames = threading.local()
+
+# start allocation frame of a stage, the peak reached so far belongs to the enclosing stage, since
+# tracemalloc has one global peak which is reset here
+def push_frame():
+    stack = _frames.__dict__.setdefault('stack', [])
+    current, peak = tracemalloc.get_traced_memory()
+    if stack:
+        stack[-1][1] = max(stack[-1][1], peak)
+    tracemalloc.reset_peak()
+    stack.append([current, current])
+
+# end allocation frame of a stage, returns its peak allocation (including nested stages) and passes the
+# peak on to the enclosing stage
+def pop_frame():
+    stack = _frames.stack
+    start, peak = stack.pop()
+    peak = max(peak, tracemalloc.get_traced_memory()[1])
+    if stack:
+        stack[-1][1] = max(stack[-1][1], peak)
+    return peak - start
+
+# decorator which records every call of a function as a stage of the shared profiler
+# samples is an optional function of (result, *args) giving the number of processed samples
+def timed(stage, samples=None):
+    def decorator(function):
+        # Qt passes signal arguments to any slot accepting them, so (like for undecorated slots)
+        # positional arguments the function doesn't take are dropped
+        code = function.__code__
+        n_args = None if code.co_flags & inspect.CO_VARARGS else code.co_argcount
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            args = args[:n_args]
+            if not profiler.enabled:
+                return function(*args, **kwargs)
+            tracing = profiler.track_allocations and tracemalloc.is_tracing()
+            if tracing:
+                push_frame()
+            t = time.perf_counter()
+            try:
+                result = function(*args, **kwargs)
+            finally:
+                ms = (time.perf_counter() - t) * 1000
+                nbytes = pop_frame() if tracing else None
+            profiler.record(stage, ms, samples(result, *args) if samples is not None else None, nbytes)
+            return result
+        return wrapper
+    return decorator
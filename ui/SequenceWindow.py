@@ -1,11 +1,31 @@
+import copy
+import sys
 from PyQt6.QtCore import *
 from PyQt6.QtWidgets import *
 import pyqtgraph as pg
 import numpy as np
 import matplotlib.pyplot as plt
 
+import calculations.CycleModel as cm
 import calculations.CycleSequence as cs
+import calculations.PlotDecimation as dec
+import calculations.NoiseModels as nm
 import ui.FilterWindow as fw
+import ui.DecimatedCurve as dc
+import ui.ComputeWorker as cw
+import ui.Profiling as prof
+
+# build raw and noisy sequences together with the plot pyramid of the noisy one from a snapshot of parameters
+# (runs in the background worker thread, so the cycle is built from its own copy of wave data)
+@prof.timed('SequenceWindow.compute_sequence', lambda result, snapshot: len(result[1]))
+def compute_sequence(snapshot):
+    ecg_cycle = cm.CycleModel(snapshot['Fh'], snapshot['waves'])
+    ecg_cycle.construct_cycle()
+    raw_ecg_sequence = cs.CycleSequence(ecg_cycle, snapshot['n'], noise_seed=snapshot['noise_seed'])
+    raw_ecg_sequence.alternate_t(snapshot['alt'])
+    noisy_ecg_sequence = raw_ecg_sequence.with_noise(snapshot['noise_level'], snapshot['noise_model'])
+    pyramid = dec.MinMaxPyramid(noisy_ecg_sequence.amp_seq, noisy_ecg_sequence.Ts / 1000)
+    return raw_ecg_sequence, noisy_ecg_sequence, pyramid
 
 # window of a generated ECG sequence
 class SequenceWindow(QWidget):
@@ -20,9 +40,17 @@ class SequenceWindow(QWidget):
             background-color: #FFFFFF;
         }''')
         
-        # initialize ECG sequence
-        self.raw_ecg_sequence = cs.CycleSequence(ecg_cycle, 30)
-        self.noisy_ecg_sequence = self.raw_ecg_sequence
+        # initialize parameters of ECG cycle the sequence is built from
+        self.Fh = ecg_cycle.Fh
+        self.waves = copy.deepcopy(ecg_cycle.waves)
+        # noise realization is kept for the whole life of the window, so it doesn't change with other parameters
+        self.noise_seed = np.random.SeedSequence().entropy
+
+        # initialize background worker which rebuilds sequence for the newest parameters only
+        self.worker = cw.ComputeWorker(compute_sequence)
+        self.worker.sig_result.connect(self.on_result)
+        self.worker.sig_stats.connect(self.on_stats)
+        self.worker.sig_error.connect(self.on_error)
 
         # initialize grid for the window
         grid = QGridLayout()
@@ -39,7 +67,7 @@ class SequenceWindow(QWidget):
         self.graphWidget.setMouseEnabled(y=False)
 
         pen = pg.mkPen(color="k", width=2, style=Qt.PenStyle.SolidLine)
-        self.points = self.graphWidget.plot(pen=pen)
+        self.points = dc.DecimatedCurve(self.graphWidget, pen)
 
         grid.addWidget(self.graphWidget, 0, 0, 1, 4)
 
@@ -123,6 +151,13 @@ class SequenceWindow(QWidget):
         self.slider_noise_value.setText('0')
         self.slider_noise_vlayout.addWidget(self.slider_noise_value, alignment=Qt.AlignmentFlag.AlignCenter)
 
+        self.noise_model = QComboBox()
+        for name, model in zip(['Uniform', 'Gaussian', 'Baseline wander', 'Power line 50 Hz', 'Power line 60 Hz', 'EMG'],
+                               nm.NOISE_MODELS):
+            self.noise_model.addItem(name, model)
+        self.noise_model.currentIndexChanged.connect(self.update_noise)
+        self.slider_noise_vlayout.addWidget(self.noise_model)
+
         grid.addWidget(self.slider_noise_group, 1, 2)
 
         # initialize filter button
@@ -147,41 +182,64 @@ class SequenceWindow(QWidget):
         self.button.clicked.connect(self.show_new_window)
         grid.addWidget(self.button, 1, 3)
 
-        # update graph based on all parameters from sliders
-        self.on_update(self.raw_ecg_sequence)
+        # initialize label with recomputation statistics
+        self.stats_label = QLabel()
+        grid.addWidget(self.stats_label, 2, 0, 1, 4)
+
+        # build initial sequence right away and update graph based on all parameters from sliders
+        self.on_result(compute_sequence(self.snapshot()))
+
+    # show sequences computed by background worker, the only path updating the graph
+    @prof.timed('SequenceWindow.on_result', lambda _, self, result: len(result[1]))
+    def on_result(self, result):
+        self.raw_ecg_sequence, self.noisy_ecg_sequence, pyramid = result
+        self.points.setPyramid(pyramid)
+
+    # show recomputation time and number of dropped (superseded) requests
+    def on_stats(self, stats):
+        self.stats_label.setText(f"Recompute: {stats['last_ms']:.1f} ms (mean {stats['mean_ms']:.1f} ms), "
+                                 f"completed: {stats['completed']}, dropped: {stats['dropped']}, failed: {stats['failed']}")
 
-    # update points of the graph every time any slider/radiobutton emitted a Qt signal
-    def on_update(self, ecg_sequence):
-        """ Update the plot with the current input values """
-        self.points.setData(ecg_sequence.time_seq / 1000, ecg_sequence.amp_seq)
+    # report failed recomputation, the previous sequence stays on the graph
+    def on_error(self, message):
+        print(message, file=sys.stderr)
+        self.stats_label.setToolTip(message)
+
+    # snapshot of all parameters the sequence depends on
+    def snapshot(self):
+        return {'Fh': self.Fh, 'waves': copy.deepcopy(self.waves), 'n': int(self.n_input.value()),
+                'alt': self.slider_alt.value() / 100, 'noise_level': self.slider_noise.value() / 100,
+                'noise_model': self.noise_model.currentData(), 'noise_seed': self.noise_seed}
 
     # rebuild sequence based on scrapped parameters from number of cycles spinbox
     def update_n(self):
-        n_new = int(self.n_input.value())
-        self.raw_ecg_sequence = cs.CycleSequence(self.raw_ecg_sequence.ecg_cycle, n_new)
-        self.update_alt()
+        self.worker.submit(self.snapshot())
 
     # rebuild cycle based on scrapped parameters from alternation level slider
+    @prof.timed('SequenceWindow.update_alt')
     def update_alt(self):
         alt = self.slider_alt.value() / 100
         self.slider_alt_value.setText(f'[{alt}]')
-        self.raw_ecg_sequence.alternate_t(alt)
-        self.update_noise()
-    
-    # rebuild cycle based on scrapped parameters from noise level slider
+        self.worker.submit(self.snapshot())
+
+    # rebuild cycle based on scrapped parameters from noise level slider and noise type combobox
+    @prof.timed('SequenceWindow.update_noise')
     def update_noise(self):
         noise_level = self.slider_noise.value() / 100
         self.slider_noise_value.setText(f'[{noise_level}]')
-        noisy_amp_seq = self.raw_ecg_sequence.amp_seq + self.raw_ecg_sequence.generate_noise(noise_level)
-        self.noisy_ecg_sequence = cs.CycleSequence(time_seq=self.raw_ecg_sequence.time_seq,
-                                                 amp_seq=noisy_amp_seq)
-        self.on_update(self.noisy_ecg_sequence)
+        self.worker.submit(self.snapshot())
 
     # rebuild sequence based on scrapped parameters from passed ecg_cycle
     def to_sequence(self, ecg_cycle):
-        self.raw_ecg_sequence = cs.CycleSequence(ecg_cycle, self.raw_ecg_sequence.n)
-        self.update_alt()
-    
+        self.Fh = ecg_cycle.Fh
+        self.waves = copy.deepcopy(ecg_cycle.waves)
+        self.worker.submit(self.snapshot())
+
+    # stop background worker together with the window
+    def closeEvent(self, event):
+        self.worker.stop()
+        super().closeEvent(event)
+
     # create filtering window when pressed Filter button
     def show_new_window(self):
         Ts = self.raw_ecg_sequence.ecg_cycle.Ts